@@ -1,36 +1,48 @@
 import streamlit as st
 from orchestration.orchestrator import handle_user_input
-from services.broker_app import get_trading_account_details, list_accounts, get_account, list_orders, list_positions
+from services import http_client
+from services.account_service import get_primary_account_id, invalidate_accounts
+from services.broker_app import get_trading_account_details, get_account, list_orders, list_positions
+from services.cache import TTLCache
+from services.chart_history import LIVE_CHART_LIMIT, ChartHistory
 from services.logger import log_message
-import plotly.graph_objects as go
+from services.rate_limiter import get_rate_limiter, resolve_client_key, set_client_key
 
-import time
+import contextvars
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-MAX_REQUESTS = 20
-WINDOW_SECONDS = 60
-def render_price_chart(symbol: str, df, key=None):
-    if df is None or df.empty:
-        st.warning("No historical data available to render the chart.")
-        return
+MAX_CHART_POINTS = 500
+# Number of reverse proxies in front of the app whose X-Forwarded-For
+# entries can be trusted; 0 keys rate limits by the connecting address.
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "0"))
+# Query parameter holding a per-browser id, used when no address is known.
+CLIENT_ID_PARAM = "cid"
+# A figure holds its own copy of the chart data, so keep no more figures
+# than ChartHistory keeps live bars.
+FIGURE_CACHE_SIZE = LIVE_CHART_LIMIT
 
-    if not all(col in df for col in ("o", "h", "l", "c")):
-        st.warning("Historical data is missing required OHLC fields.")
-        return
 
-    df = df.sort_index()
-    low = df["l"].min()
-    high = df["h"].max()
+def build_price_figure(symbol: str, bars):
+    # Plotly is only needed once a chart is drawn; keep it off the startup path.
+    import plotly.graph_objects as go
+
+    # Bars are stored in time order, so the arrays go to Plotly as-is.
+    bars = bars.downsample(MAX_CHART_POINTS)
+    low = bars.l.min()
+    high = bars.h.max()
 
     padding = (high - low) * 0.05 if high is not None and low is not None else 0.0
 
     fig = go.Figure(
         data=[
             go.Candlestick(
-                x=df.index,
-                open=df["o"],
-                high=df["h"],
-                low=df["l"],
-                close=df["c"],
+                x=bars.timestamps(),
+                open=bars.o,
+                high=bars.h,
+                low=bars.l,
+                close=bars.c,
                 increasing_line_color="green",
                 decreasing_line_color="red",
                 increasing_fillcolor="rgba(0, 128, 0, 0.5)",
@@ -51,40 +63,92 @@ def render_price_chart(symbol: str, df, key=None):
         yaxis_title="Price",
         xaxis_rangeslider_visible=False
     )
+    return fig
 
-    st.plotly_chart(fig, use_container_width=True, key=key)
 
-def load_sidebar_data():
-    try:
-        accounts = list_accounts()
-        account_id = accounts[0]["id"]
+def render_price_chart(idx):
+    chart_meta = st.session_state.chart_history.peek(idx)
+    if chart_meta is None:
+        st.warning("No historical data available to render the chart.")
+        return
 
-        st.session_state.account_snapshot = get_account(account_id)
-        st.session_state.trading_account = get_trading_account_details(account_id)
-        st.session_state.recent_orders = list_orders(account_id, limit=5)
-        st.session_state.positions = list_positions(account_id)
+    # Figures are built once per chart and reused across reruns; bars are
+    # only loaded (possibly from disk) when the figure isn't memoized.
+    key = chart_meta["key"]
+    fig = st.session_state.chart_figures.get(key)
+    if fig is None:
+        chart_info = st.session_state.chart_history.get(idx)
+        bars = chart_info["bars"] if chart_info else None
+        if bars is None or len(bars) == 0:
+            st.warning("No historical data available to render the chart.")
+            return
+        fig = build_price_figure(chart_info["symbol"], bars)
+        st.session_state.chart_figures.set(key, fig)
+    st.plotly_chart(fig, use_container_width=True, key=key)
 
-    except Exception:
-        st.session_state.account_snapshot = None
-        st.session_state.recent_orders = []
-        st.session_state.positions = []
 
-if "request_times" not in st.session_state:
-    st.session_state.request_times = []
+SIDEBAR_SECTIONS = {
+    "account_snapshot": lambda account_id: get_account(account_id),
+    "trading_account": lambda account_id: get_trading_account_details(account_id),
+    "recent_orders": lambda account_id: list_orders(account_id, limit=5),
+    "positions": lambda account_id: list_positions(account_id),
+}
+SIDEBAR_DEFAULTS = {
+    "account_snapshot": None,
+    "trading_account": None,
+    "recent_orders": [],
+    "positions": [],
+}
 
-now = time.time()
 
-# keep only recent requests
-st.session_state.request_times = [
-    t for t in st.session_state.request_times
-    if now - t < WINDOW_SECONDS
-]
+def load_sidebar_data(on_section_loaded=None):
+    # The broker calls run on worker threads; session state is only touched
+    # here on the script thread, as each section completes.
+    errors = {}
+    st.session_state.sidebar_errors = errors
 
-if len(st.session_state.request_times) >= MAX_REQUESTS:
-    st.warning("⚠️ Too many requests. Please wait a minute.")
-    st.stop()
+    try:
+        account_id = get_primary_account_id()
+    except Exception as exc:
+        for section, default in SIDEBAR_DEFAULTS.items():
+            st.session_state[section] = default
+            errors[section] = str(exc)
+        return
 
-st.session_state.request_times.append(now)
+    with ThreadPoolExecutor(max_workers=len(SIDEBAR_SECTIONS)) as executor:
+        # Each worker runs in a copy of this context so broker calls are
+        # charged to the current client's rate-limit key at this priority.
+        futures = {
+            executor.submit(contextvars.copy_context().run, fetch, account_id): section
+            for section, fetch in SIDEBAR_SECTIONS.items()
+        }
+        for future in as_completed(futures):
+            section = futures[future]
+            try:
+                st.session_state[section] = future.result()
+            except Exception as exc:
+                st.session_state[section] = SIDEBAR_DEFAULTS[section]
+                errors[section] = str(exc)
+
+            if on_section_loaded:
+                on_section_loaded(section)
+
+
+def rate_limit_key() -> str:
+    # Keyed on the client rather than the session, so a refresh or a second
+    # tab doesn't start with full buckets. X-Forwarded-For only counts behind
+    # TRUSTED_PROXY_HOPS proxies; st.context.ip_address is None on localhost,
+    # where a client id kept in the URL stands in.
+    try:
+        forwarded = st.context.headers.get("X-Forwarded-For", "")
+        ip_address = st.context.ip_address
+    except Exception:
+        forwarded, ip_address = "", None
+    client_id = st.query_params.get(CLIENT_ID_PARAM)
+    if not client_id:
+        client_id = uuid.uuid4().hex
+        st.query_params[CLIENT_ID_PARAM] = client_id
+    return resolve_client_key(forwarded, ip_address, client_id, TRUSTED_PROXY_HOPS)
 
 
 st.title("AI Investment Assistant - v1.0a")
@@ -98,126 +162,166 @@ if "trade_state" not in st.session_state:
     st.session_state.trade_state = {}
 
 if "chart_history" not in st.session_state:
-    st.session_state.chart_history = {}
+    st.session_state.chart_history = ChartHistory()
 
+if "chart_figures" not in st.session_state:
+    st.session_state.chart_figures = TTLCache(maxsize=FIGURE_CACHE_SIZE, ttl=float("inf"))
 
-# ---------- Account Snapshot (load once per session) ----------
-if "sidebar_loaded" not in st.session_state:
-    load_sidebar_data()
-    st.session_state.sidebar_loaded = True
-#    try:
-#        accounts = list_accounts()
-#        account_id = accounts[0]["id"]
-    
-#        st.session_state.account_snapshot = get_account(account_id)
-#        st.session_state.trading_account = get_trading_account_details(account_id)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
 
-#    except Exception as e:
-#        st.session_state.account_snapshot = None
-#        st.sidebar.error("Failed to load account snapshot")
+set_client_key(rate_limit_key())
 
-with st.sidebar:
-    if st.button("🔄 Refresh"):
-        load_sidebar_data()
-        st.rerun()
 
-    st.header("📊 Account Snapshot")
+# ---------- Sidebar ----------
+def render_account_snapshot(container):
+    with container:
+        st.header("📊 Account Snapshot")
 
-    snapshot = st.session_state.get("account_snapshot")
+        snapshot = st.session_state.get("account_snapshot")
 
-    if snapshot:
-        trading_account = st.session_state.get("trading_account")
+        if snapshot:
+            trading_account = st.session_state.get("trading_account")
 
-        st.markdown("**Account**")
-        st.write(snapshot["account_number"])
+            st.markdown("**Account**")
+            st.write(snapshot["account_number"])
 
-        st.markdown("**Equity**")
-        last_equity = float(snapshot.get("last_equity", 0))
-        st.write(f"${last_equity:,.2f}")
+            st.markdown("**Equity**")
+            last_equity = float(snapshot.get("last_equity", 0))
+            st.write(f"${last_equity:,.2f}")
 
-        #st.write(f"${snapshot['last_equity']}")
+            if trading_account:
+                buying_power = float(trading_account.get("buying_power", 0))
 
-        if trading_account:
-            buying_power = float(trading_account.get("buying_power", 0))
+                st.markdown("**Buying Power**")
+                st.write(f"${buying_power:,.2f}")
 
-            st.markdown("**Buying Power**")
-            st.write(f"${buying_power:,.2f}")
+        elif "account_snapshot" in st.session_state.get("sidebar_errors", {}):
+            st.warning("Account data could not be loaded")
+        else:
+            st.info("Account data not available")
 
-    else:
-        st.info("Account data not available")    
 
-# ---------- Recent Order  ----------
-# Get account ID
-#accounts = list_accounts()
-#account_id = accounts[0]["id"]
+def render_recent_orders(container):
+    orders = st.session_state.get("recent_orders", [])
 
-# Fetch 5 most recent orders
-#orders = list_orders(account_id, limit=5)
-orders = st.session_state.get("recent_orders", [])
+    with container:
+        st.markdown("### 🧾 Recent Orders")
 
-st.sidebar.markdown("### 🧾 Recent Orders")
+        if "recent_orders" in st.session_state.get("sidebar_errors", {}):
+            st.warning("Recent orders could not be loaded")
+        elif not orders:
+            st.write("No recent orders.")
+        else:
+            for order in orders:
+                symbol = order.get("symbol")
+                qty = order.get("qty")
+                status = order.get("status")
 
-if not orders:
-    st.sidebar.write("No recent orders.")
-else:
-    for order in orders:
-        symbol = order.get("symbol")
-        qty = order.get("qty")
-        status = order.get("status")
+                st.write(
+                    f"**{symbol}** — {qty} shares\nStatus: `{status}`"
+                )
 
-        st.sidebar.write(
-            f"**{symbol}** — {qty} shares\nStatus: `{status}`"
-        )
 
-# ---------- Top holdings  ----------
-def render_top_holdings():
+def render_top_holdings(container):
     positions = st.session_state.get("positions", [])
 
-    if not positions:
-        st.sidebar.markdown("### 📊 Top Holdings")
-        st.sidebar.write("No positions yet.")
-        return
+    with container:
+        st.markdown("### 📊 Top Holdings")
 
-    sorted_positions = sorted(
-        positions,
-        key=lambda x: float(x.get("market_value", 0)),
-        reverse=True
-    )
+        if "positions" in st.session_state.get("sidebar_errors", {}):
+            st.warning("Holdings could not be loaded")
+            return
 
-    top_5 = sorted_positions[:5]
+        if not positions:
+            st.write("No positions yet.")
+            return
 
-    st.sidebar.markdown("### 📊 Top Holdings")
+        sorted_positions = sorted(
+            positions,
+            key=lambda x: float(x.get("market_value", 0)),
+            reverse=True
+        )
 
-    for pos in top_5:
-        symbol = pos["symbol"]
-        qty = pos["qty"]
-        market_value = float(pos["market_value"])
+        top_5 = sorted_positions[:5]
 
-        st.sidebar.write(
-            f"**{symbol}** — {qty} shares  \n"
-            f"Market value: ${market_value:,.2f}"
-        )
-render_top_holdings()
+        for pos in top_5:
+            symbol = pos["symbol"]
+            qty = pos["qty"]
+            market_value = float(pos["market_value"])
+
+            st.write(
+                f"**{symbol}** — {qty} shares  \n"
+                f"Market value: ${market_value:,.2f}"
+            )
+
+
+with st.sidebar:
+    refresh_clicked = st.button("🔄 Refresh")
+    sidebar_slots = {
+        "account": st.empty(),
+        "recent_orders": st.empty(),
+        "positions": st.empty(),
+    }
+
+SIDEBAR_RENDERERS = {
+    "account": render_account_snapshot,
+    "recent_orders": render_recent_orders,
+    "positions": render_top_holdings,
+}
+
+
+def render_sidebar_section(section):
+    if section in ("account_snapshot", "trading_account"):
+        section = "account"
+    slot = sidebar_slots[section]
+    SIDEBAR_RENDERERS[section](slot.container())
+
+
+if refresh_clicked:
+    invalidate_accounts()
+    st.session_state.pop("sidebar_loaded", None)
+
+# Load once per session (or on refresh), painting each section as it arrives
+if "sidebar_loaded" not in st.session_state:
+    # Sidebar refreshes queue behind order placement for the broker quota.
+    with http_client.priority(http_client.PRIORITY_LOW):
+        load_sidebar_data(on_section_loaded=render_sidebar_section)
+    st.session_state.sidebar_loaded = True
+
+for section in SIDEBAR_RENDERERS:
+    render_sidebar_section(section)
 # ---------- Render Chat History ----------
+# Only the newest chart is drawn up front; older ones stay collapsed and are
+# built only when the user asks for them.
+latest_chart_idx = st.session_state.chart_history.latest_index()
+
 for idx, msg in enumerate(st.session_state.messages):
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
     if msg["role"] == "assistant":
-        chart_info = st.session_state.chart_history.get(idx)
-        if chart_info:
-            st.subheader(f"{chart_info['symbol']} - Last 30 Days")
-            render_price_chart(
-                chart_info["symbol"],
-                chart_info["df"],
-                key=chart_info.get("key"),
-            )
+        chart_meta = st.session_state.chart_history.peek(idx)
+        if chart_meta:
+            title = f"{chart_meta['symbol']} - Last 30 Days"
+            if idx == latest_chart_idx:
+                st.subheader(title)
+                render_price_chart(idx)
+            elif st.toggle(f"📈 {title}", key=f"show_{chart_meta['key']}"):
+                render_price_chart(idx)
 
 # ---------- Chat Input ----------
 user_input = st.chat_input("What would you like to do today?")
 
 
 
+# Only actual chat turns count against the chat budget, not reruns or clicks.
+if user_input:
+    chat_allowed, retry_after = get_rate_limiter().acquire("chat")
+    if not chat_allowed:
+        st.warning(f"⚠️ Too many requests. Please wait {retry_after:.0f} seconds.")
+        user_input = None
+
 if user_input:
     # 1️⃣ Save user message
     st.session_state.messages.append({
@@ -231,6 +335,14 @@ if user_input:
     # 2️⃣ Get assistant response
     response = handle_user_input(user_input)
 
+    # Streamed answers (market research) are drawn as they arrive, then
+    # stored as plain text like every other response.
+    if response is not None and not isinstance(response, str):
+        with st.chat_message("user"):
+            st.markdown(user_input)
+        with st.chat_message("assistant"):
+            response = st.write_stream(response)
+
     # 3️⃣ Save assistant response (ONLY if non-empty)
     if response:
         st.session_state.messages.append({
@@ -241,7 +353,7 @@ if user_input:
         pending_chart = st.session_state.pop("pending_market_data_chart", None)
         if pending_chart:
             idx = len(st.session_state.messages) - 1
-            st.session_state.chart_history[idx] = pending_chart
+            st.session_state.chart_history.add(idx, pending_chart)
 
     # ✅ Log assistant response immediately
     log_message("assistant", response, session_id=st.session_state.get("session_id", "session1"))
@@ -249,8 +361,30 @@ if user_input:
     # 4️⃣ Force rerender
     st.rerun()
 
+# ---------- Upstream Status ----------
+BREAKER_BADGES = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+
+
+def render_upstream_status():
+    breakers = http_client.get_breaker_stats()
+    if not breakers:
+        return
+
+    governors = http_client.get_governor_stats()
+    with st.expander("🔌 Upstream Status"):
+        for origin, breaker in sorted(breakers.items()):
+            line = f"{BREAKER_BADGES[breaker['state']]} **{origin.split('://', 1)[-1]}** · {breaker['state'].replace('_', '-')}"
+            if breaker["state"] == "open":
+                line += f" (retry in {breaker['retry_in_seconds']:.0f}s)"
+            governor = governors.get(origin)
+            if governor:
+                line += f" · queue {governor['queue_depth']}, avg wait {governor['wait_avg_seconds'] * 1000:.0f} ms"
+            st.caption(line)
+
+
 # ---------- Footer ----------
 with st.sidebar:
+    render_upstream_status()
     st.markdown("<hr>", unsafe_allow_html=True)
     st.markdown(
         """
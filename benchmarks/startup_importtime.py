@@ -0,0 +1,137 @@
+"""
+Startup import benchmark.
+
+Imports the modules app.py pulls in before the first render under
+`python -X importtime`, reports the total and the heaviest imports, and
+fails if the total exceeds the budget or a deferred dependency (Plotly
+figures, pandas, openai, Azure tables) was loaded at startup by our code.
+Modules that a bare `import streamlit` already loads are not held against us.
+
+    python benchmarks/startup_importtime.py [--budget-ms 1500] [--output results.json]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py imports at startup, minus streamlit itself.
+STARTUP_MODULES = [
+    "orchestration.orchestrator",
+    "services.account_service",
+    "services.broker_app",
+    "services.cache",
+    "services.chart_history",
+    "services.http_client",
+    "services.logger",
+    "services.rate_limiter",
+]
+
+# Must only be imported on the code paths that use them. Matched by dotted
+# name: streamlit itself imports the top-level plotly package, but never
+# plotly.graph_objects.
+DEFERRED_MODULES = ["plotly.graph_objects", "pandas", "openai", "httpx", "azure.data.tables"]
+
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "1500"))
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(modules: list[str]) -> list[dict]:
+    """
+    Runs a fresh interpreter and returns one entry per imported module with
+    its self and cumulative time in microseconds and its nesting depth.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def _is_deferred(name: str) -> bool:
+    return any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED_MODULES)
+
+
+def streamlit_baseline() -> set[str]:
+    """
+    Modules a bare `import streamlit` loads; empty if streamlit is missing.
+    """
+    try:
+        return {entry["module"] for entry in measure(["streamlit"])}
+    except RuntimeError:
+        return set()
+
+
+def summarize(entries: list[dict], baseline: set[str] = frozenset(), top: int = 15) -> dict:
+    total_us = sum(entry["cumulative_us"] for entry in entries if entry["depth"] == 0)
+    loaded = {entry["module"] for entry in entries}
+    deferred_loaded = sorted(
+        name for name in loaded - baseline
+        if _is_deferred(name)
+    )
+    heaviest = sorted(
+        (entry for entry in entries if entry["depth"] == 0),
+        key=lambda entry: entry["cumulative_us"],
+        reverse=True,
+    )[:top]
+    return {
+        "total_ms": total_us / 1000,
+        "module_count": len(entries),
+        "deferred_loaded": deferred_loaded,
+        "heaviest": [
+            {"module": entry["module"], "cumulative_ms": entry["cumulative_us"] / 1000}
+            for entry in heaviest
+        ],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--output", help="write the summary as JSON to this path")
+    args = parser.parse_args()
+
+    summary = summarize(measure(STARTUP_MODULES), streamlit_baseline())
+    summary["budget_ms"] = args.budget_ms
+
+    print(f"startup imports: {summary['total_ms']:.1f} ms "
+          f"({summary['module_count']} modules, budget {args.budget_ms:.0f} ms)")
+    for entry in summary["heaviest"]:
+        print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2)
+
+    failed = False
+    if summary["deferred_loaded"]:
+        print("deferred modules imported at startup: " + ", ".join(summary["deferred_loaded"]))
+        failed = True
+    if summary["total_ms"] > args.budget_ms:
+        print(f"over budget by {summary['total_ms'] - args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
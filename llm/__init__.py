@@ -1,11 +1,32 @@
 import os
+import threading
+from llm.cache import CachedLLM, LLMResponseStore
 from llm.openai_llm import OpenAILLM
 from llm.mock_llm import MockLLM
 
+_client = None
+_client_lock = threading.Lock()
+
+
 def get_llm_client():
+    """
+    Returns the process-wide LLM client; every caller shares one instance.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_llm_client()
+    return _client
+
+
+def _build_llm_client():
     provider = os.getenv("LLM_PROVIDER", "openai")
 
     if provider == "openai":
-        return OpenAILLM()
+        client = OpenAILLM()
+        if os.getenv("LLM_CACHE", "on") != "off":
+            client = CachedLLM(client, store=LLMResponseStore())
+        return client
     else:
         return MockLLM()
@@ -9,3 +9,6 @@ class AzureOpenAILLM(LLMClient):
 
     def classify_intent(self, user_input: str) -> dict:
         pass
+
+    def classify_and_parse(self, user_input: str) -> dict:
+        raise NotImplementedError("AzureOpenAILLM does not support classify_and_parse yet.")
@@ -1,5 +1,14 @@
 from abc import ABC, abstractmethod
 
+
+class FallbackResult(dict):
+    """
+    A default returned in place of a model reply that could not be used
+    (e.g. invalid JSON). Behaves like the normal dict result, but callers
+    such as CachedLLM must not remember it.
+    """
+
+
 class LLMClient(ABC):
 
     @abstractmethod
@@ -13,10 +22,25 @@ class LLMClient(ABC):
         """
         pass
 
+    @abstractmethod
+    def classify_and_parse(self, user_input: str) -> dict:
+        """
+        Classifies intent and extracts trade parameters in one call.
+        Returns {"intent": str, "confidence": float, "params": <parse() result>}.
+        """
+        pass
+
     @abstractmethod
     def summarize_articles(self, articles: list[dict], query_hint: str | None = None) -> str:
         pass
 
+    def stream_summarize_articles(self, articles: list[dict], query_hint: str | None = None):
+        """
+        Yields the summary in pieces as it is generated. Providers without
+        streaming yield the whole summary at once.
+        """
+        yield self.summarize_articles(articles, query_hint)
+
     @abstractmethod
     def extract_company_details(self, user_input: str) -> dict:
         pass
@@ -0,0 +1,253 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from llm.base import FallbackResult, LLMClient
+from services.cache import TTLCache
+
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite3"))
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_MAX_ROWS = int(os.environ.get("LLM_CACHE_MAX_ROWS", "20000"))
+# How many writes between trims of the on-disk store back to LLM_CACHE_MAX_ROWS.
+PRUNE_EVERY = 100
+
+
+def normalize_input(user_input: str) -> str:
+    return " ".join((user_input or "").lower().split())
+
+
+def article_set_key(articles: list[dict]) -> list[str]:
+    """
+    Order-independent identity of an article list: sorted article IDs,
+    falling back to URL and then title.
+    """
+    return sorted(
+        str(article.get("articleId") or article.get("id") or article.get("url")
+            or article.get("link") or article.get("title") or "")
+        for article in articles
+    )
+
+
+class LLMResponseStore:
+    """
+    SQLite-backed response store shared by every process on the host. Each
+    operation opens its own short-lived connection, so it is safe to use
+    from any thread.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_rows: int = LLM_CACHE_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " method TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+
+    def get(self, key: str, ttl: float):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] >= ttl:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+        return json.loads(row[0])
+
+    def set(self, key: str, method: str, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, method, value, created_at) VALUES (?, ?, ?, ?)",
+                (key, method, json.dumps(value), time.time()),
+            )
+
+        with self._writes_lock:
+            self._writes += 1
+            prune = self._writes % PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        # Drops the oldest rows beyond max_rows.
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    def invalidate(self, method: str | None = None):
+        with self._connect() as conn:
+            if method is None:
+                conn.execute("DELETE FROM llm_cache")
+            else:
+                conn.execute("DELETE FROM llm_cache WHERE method = ?", (method,))
+
+    def _connect(self):
+        return _closing_connection(sqlite3.connect(self.path, timeout=5))
+
+
+class _closing_connection:
+    # sqlite3's own context manager commits but never closes the connection.
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+        finally:
+            self.conn.close()
+
+
+class CachedLLM(LLMClient):
+    """
+    Wraps any LLMClient and caches its deterministic extraction calls, plus
+    article summaries.
+
+    Keys combine the method, model, the wrapped client's prompt version for
+    that method and the normalized input (for summaries: the query hint and
+    the sorted article identities). Lookups go to an in-process LRU first,
+    then to the shared on-disk store.
+    """
+
+    def __init__(self, inner: LLMClient, store: LLMResponseStore | None = None,
+                 ttl: float = LLM_CACHE_TTL_SECONDS, maxsize: int = LLM_CACHE_SIZE):
+        self.inner = inner
+        self.store = store
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._stats_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def __getattr__(self, name):
+        # Anything not cached (e.g. provider-specific helpers) goes straight through.
+        return getattr(self.inner, name)
+
+    def classify_intent(self, user_input: str) -> dict:
+        return self._cached("classify_intent", user_input)
+
+    def parse(self, user_input: str) -> dict:
+        return self._cached("parse", user_input)
+
+    def classify_and_parse(self, user_input: str) -> dict:
+        return self._cached("classify_and_parse", user_input)
+
+    def extract_company_details(self, user_input: str) -> dict:
+        return self._cached("extract_company_details", user_input)
+
+    def summarize_articles(self, articles: list[dict], query_hint: str | None = None) -> str:
+        if not articles:
+            return self.inner.summarize_articles(articles, query_hint)
+
+        key = self._summary_key(articles, query_hint)
+        summary = self._lookup(key)
+        if summary is None:
+            self._count("misses")
+            summary = self.inner.summarize_articles(articles, query_hint)
+            self._remember(key, "summarize_articles", summary)
+        return summary
+
+    def stream_summarize_articles(self, articles: list[dict], query_hint: str | None = None):
+        if not articles:
+            yield from self.inner.stream_summarize_articles(articles, query_hint)
+            return
+
+        key = self._summary_key(articles, query_hint)
+        summary = self._lookup(key)
+        if summary is not None:
+            yield summary
+            return
+
+        self._count("misses")
+        chunks = []
+        for chunk in self.inner.stream_summarize_articles(articles, query_hint):
+            chunks.append(chunk)
+            yield chunk
+        # Only a stream that ran to completion is worth caching.
+        self._remember(key, "summarize_articles", "".join(chunks).strip())
+
+    def cache_key(self, method: str, user_input: str) -> str:
+        model = getattr(self.inner, "model", type(self.inner).__name__)
+        prompt_version = self._prompt_version(method)
+        raw = json.dumps([method, model, prompt_version, normalize_input(user_input)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _summary_key(self, articles: list[dict], query_hint: str | None) -> str:
+        return self.cache_key(
+            "summarize_articles",
+            json.dumps([normalize_input(query_hint), article_set_key(articles)]),
+        )
+
+    def invalidate(self, method: str | None = None):
+        # The in-memory LRU is not indexed by method, so it is cleared whole.
+        self._memory.invalidate()
+        if self.store is not None:
+            self.store.invalidate(method)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _prompt_version(self, method: str) -> str:
+        prompt_version = getattr(self.inner, "prompt_version", None)
+        return prompt_version(method) if prompt_version else "unversioned"
+
+    def _cached(self, method: str, user_input: str):
+        key = self.cache_key(method, user_input)
+
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        self._count("misses")
+        value = getattr(self.inner, method)(user_input)
+        # A fallback stands in for an unusable reply; the next call should
+        # ask the model again rather than replay it.
+        if not isinstance(value, FallbackResult):
+            self._remember(key, method, value)
+        return value
+
+    def _lookup(self, key: str):
+        value = self._memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return copy.deepcopy(value)
+
+        if self.store is not None:
+            value = self.store.get(key, self.ttl)
+            if value is not None:
+                self._count("disk_hits")
+                self._memory.set(key, value)
+                return copy.deepcopy(value)
+
+        return None
+
+    def _remember(self, key: str, method: str, value):
+        self._memory.set(key, copy.deepcopy(value))
+        if self.store is not None:
+            self.store.set(key, method, value)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
@@ -1,15 +1,13 @@
-import os
-from openai import OpenAI
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from llm.registry import get_openai_client, llm_request_slot
 
 def chat(messages):
     """
     Sends messages to the LLM and returns the assistant reply.
     """
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-        temperature=0.2
-    )
+    with llm_request_slot():
+        response = get_openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=0.2
+        )
     return response.choices[0].message.content
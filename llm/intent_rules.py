@@ -0,0 +1,100 @@
+import re
+
+# (intent, pattern, confidence). Every matching rule votes for its intent and
+# the intent keeps its strongest vote. Patterns run against lower-cased input.
+INTENT_RULES = [
+    ("place_trade", r"^(?:please\s+)?(?:buy|sell|purchase)\b", 0.95),
+    ("place_trade", r"\b(?:buy|sell|purchase)\b.*\b(?:shares?|stocks?|units?|\d+)\b", 0.9),
+    ("place_trade", r"\b(?:buy|sell)\b", 0.75),
+    ("place_trade", r"\b(?:place|make)\s+(?:a\s+)?(?:trade|order)\b", 0.85),
+    ("place_trade", r"\btrade\b", 0.7),
+
+    ("cancel_order", r"\bcancel\b.*\border\b", 0.95),
+    ("cancel_order", r"\bcancel\b", 0.8),
+
+    ("view_orders", r"\b(?:open|pending|active|recent|my|all)\s+orders\b", 0.9),
+    ("view_orders", r"\b(?:show|list|view|see)\b.*\borders\b", 0.9),
+    ("view_orders", r"\b(?:my|last|latest|recent)\s+order\b", 0.8),
+    ("view_orders", r"\border\b.*\bfill(?:ed|s)?\b", 0.8),
+
+    ("view_portfolio", r"\b(?:portfolio|holdings|positions)\b", 0.9),
+    ("place_trade", r"\b(?:close|liquidate|exit)\b.*\b(?:positions?|holdings?)\b", 0.85),
+    ("view_portfolio", r"\b(?:what|which)\s+(?:stocks|shares)\s+do\s+i\s+(?:own|have|hold)\b", 0.9),
+
+    ("market_data", r"\b(?:price|quote|trading at|day high|day low|opening price|closing price|volume)\b", 0.9),
+    ("market_data", r"\bhow\s+is\s+\$?[a-z]{1,5}\s+(?:doing|trading)\b", 0.7),
+
+    ("market_research", r"\b(?:news|headlines|research|investment ideas|market trends?)\b", 0.9),
+    ("market_research", r"\b(?:compare|comparison|outlook|should i invest)\b", 0.85),
+    ("market_research", r"\blatest\s+on\b", 0.8),
+
+    ("transfer", r"\b(?:transfer|deposit|withdraw|withdrawal)\b", 0.9),
+
+    ("kyc", r"\b(?:kyc|verify my identity)\b", 0.9),
+    ("kyc", r"\b(?:update|change)\s+(?:my\s+)?address\b", 0.9),
+    ("kyc", r"\bmy\s+address\b", 0.8),
+    ("kyc", r"\bupdate\s+my\s+(?:profile|email|phone|name)\b", 0.85),
+
+    ("help_faq", r"^(?:help|faq)\b", 0.9),
+    ("help_faq", r"\b(?:how\s+(?:do|can)\s+i|where\s+(?:do|can)\s+i)\b", 0.75),
+]
+
+_COMPILED_RULES = [(intent, re.compile(pattern), confidence) for intent, pattern, confidence in INTENT_RULES]
+
+# When two intents match with votes this close, the input is ambiguous.
+AMBIGUITY_MARGIN = 0.1
+AMBIGUITY_PENALTY = 0.3
+# "How do I buy stocks?" is a help question, not an order: when a help
+# pattern matches, action intents are capped below any sensible fast-path
+# threshold so the LLM makes the call.
+ACTION_INTENTS = ("place_trade", "cancel_order", "transfer", "kyc")
+HELP_QUESTION_CAP = 0.6
+# Same for asking an opinion: "buy or sell nvda, what do you think?" wants
+# advice, not an order ticket.
+ADVICE_PATTERNS = [
+    r"\bwhat do you think\b",
+    r"\bshould i\b",
+    r"\b(?:buy|sell)\s+or\s+(?:buy|sell|hold)\b",
+    r"\b(?:advice|advise|recommend\w*|opinion)\b",
+    r"\?$",
+]
+
+_COMPILED_ADVICE = [re.compile(pattern) for pattern in ADVICE_PATTERNS]
+
+
+def classify_intent_rules(user_input: str) -> dict:
+    """
+    Local keyword/pattern intent classifier. Returns the same shape as
+    LLMClient.classify_intent; confidence is low when nothing or several
+    competing intents matched.
+    """
+    text = " ".join((user_input or "").lower().split())
+
+    scores = {}
+    for intent, pattern, confidence in _COMPILED_RULES:
+        if confidence > scores.get(intent, 0.0) and pattern.search(text):
+            scores[intent] = confidence
+
+    # Asking for a price while also saying buy/sell is a trade, not a quote;
+    # asking what price an order filled at is about the order.
+    if "market_data" in scores and ("place_trade" in scores or "view_orders" in scores):
+        scores.pop("market_data")
+    # "Sell my holdings" / "close all positions" act on the portfolio rather
+    # than asking to see it.
+    if scores.get("place_trade", 0.0) >= 0.85:
+        scores.pop("view_portfolio", None)
+
+    if "help_faq" in scores or any(pattern.search(text) for pattern in _COMPILED_ADVICE):
+        for intent in ACTION_INTENTS:
+            if intent in scores:
+                scores[intent] = min(scores[intent], HELP_QUESTION_CAP)
+
+    if not scores:
+        return {"intent": "unknown", "confidence": 0.0}
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    intent, confidence = ranked[0]
+    if len(ranked) > 1 and confidence - ranked[1][1] < AMBIGUITY_MARGIN:
+        confidence = max(confidence - AMBIGUITY_PENALTY, 0.0)
+
+    return {"intent": intent, "confidence": confidence}
@@ -1,29 +1,12 @@
 import re
 
 from llm.base import LLMClient
+from llm.intent_rules import classify_intent_rules
 
 class MockLLM(LLMClient):
     def classify_intent(self, user_input: str) -> dict:
-        text = user_input.lower()
-
-        market_data_keywords = ("market data", "price of", "current price", "show me the price", "quote", "what's the price", "how is")
-        if any(keyword in text for keyword in market_data_keywords) and "buy" not in text and "sell" not in text:
-            return {"intent": "market_data", "confidence": 0.7}
+        return classify_intent_rules(user_input)
 
-        if "cancel" in text:
-            return {"intent": "cancel_order", "confidence": 0.6}
-
-        if "buy" in text or "sell" in text:
-            return {"intent": "place_trade", "confidence": 0.6}
-        if "transfer" in text:
-            return {"intent": "transfer", "confidence": 0.6}
-        if "address" in text or "kyc" in text:
-            return {"intent": "kyc", "confidence": 0.6}
-        if "portfolio" in text or "performance" in text:
-            return {"intent": "portfolio_insight", "confidence": 0.6}
-
-        return {"intent": "unknown", "confidence": 0.3}
-    
     def extract_trade_parameters(self, user_input: str) -> dict:
         return {
             "symbol": "AAPL",
@@ -76,6 +59,10 @@ class MockLLM(LLMClient):
 
         return parsed
 
+    def classify_and_parse(self, user_input: str) -> dict:
+        intent_result = self.classify_intent(user_input)
+        return {**intent_result, "params": self.parse(user_input)}
+
     def summarize_articles(self, articles: list[dict], query_hint: str | None = None) -> str:
         if not articles:
             return "No articles were provided to summarize."
@@ -88,6 +75,10 @@ class MockLLM(LLMClient):
 
         return "\n".join(summary_lines)
 
+    def stream_summarize_articles(self, articles: list[dict], query_hint: str | None = None):
+        for line in self.summarize_articles(articles, query_hint).splitlines(keepends=True):
+            yield line
+
     def extract_company_details(self, user_input: str) -> dict:
         text = user_input or ""
         symbol_match = re.search(r"\$?([A-Za-z]{1,5})", text)
@@ -1,19 +1,12 @@
-from openai import OpenAI
-from llm.base import LLMClient
-import os
+from llm.base import FallbackResult, LLMClient
+from llm.prompt_builder import SUMMARY_TOKEN_BUDGET, build_summary_prompt
+from llm.registry import get_openai_client, llm_request_slot
 import json
-import streamlit as st
+import hashlib
 
-class OpenAILLM:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set")
-
-        self.client = OpenAI(api_key=api_key)
+MODEL = "gpt-4o-mini"
 
-    def classify_intent(self, user_input: str) -> dict:
-        system_prompt = """
+INTENT_PROMPT = """
 You are an intent classifier for a trading platform assistant.
 
 Possible intents:
@@ -44,26 +37,7 @@ Return JSON ONLY in this format:
 }
 """
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=0
-        )
-
-        content = response.choices[0].message.content
-
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            return {"intent": "unknown", "confidence": 0.0}
-
-
-    def parse(self, user_input: str) -> dict:
-            
-        system_prompt = """
+PARSE_PROMPT = """
 You are an AI assistant for a trading platform.  
 
 Extract structured trade instructions in JSON format.  
@@ -85,8 +59,138 @@ Rules:
 - Only parse what is explicitly mentioned by the user
 """
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+CLASSIFY_AND_PARSE_PROMPT = """
+You are an intent classifier and trade instruction extractor for a trading platform assistant.
+
+Possible intents:
+- place_trade
+- cancel_order
+- view_orders
+- view_portfolio
+- transfer
+- kyc
+- help_faq
+- market_data
+- market_research
+- unknown
+
+cancel_order: user wants to cancel an existing open order.
+view_orders: user wants to view the details of all open orders.
+view_portfolio: user wants to view the details of all the stocks in their account.
+market_data: user is asking for information about a particular stock such as its current price,
+day high, day low, historical price, trading volume, opening price, closing price
+market_research: user is asking for investment ideas, comparisons, news,
+market trends, or research-oriented information.
+help_faq: user is asking how to do something in the app or where to find information.
+
+Also extract any trade parameters the user mentioned.
+
+Return JSON ONLY in this format:
+{
+  "intent": "<intent>",
+  "confidence": 0.0-1.0,
+  "params": {
+    "symbol": string | null,
+    "quantity": number | null,
+    "price": number | null,
+    "action": "buy" | "sell" | null,
+    "order_type": "market" | "limit" | null,
+    "account": "cash" | "tfsa" | "rrsp" | null,
+    "order_id": string | null
+  }
+}
+
+Rules for params:
+- If the user did not provide a value for a field, return null
+- Do not assume defaults for missing fields
+- Only parse what is explicitly mentioned by the user
+"""
+
+SUMMARY_PROMPT = """
+You are a factual summarizer. Summarize only the information that is present in the provided articles.
+Do not include anything the articles do not explicitly state. Stick to neutral language and reference the article titles or sources when clarity helps.
+Respond with a short paragraph and up to five bullet points highlighting the main facts.
+"""
+
+COMPANY_PROMPT = """
+You are a metadata extractor for a trading research assistant.
+Return JSON ONLY:
+{
+  "company_name": "Full company name or null",
+  "company_symbol": "Ticker symbol in uppercase or null"
+}
+If the user mentions a company name or ticker anywhere in the text, capture it exactly as provided (symbol in uppercase). Otherwise return null values.
+"""
+
+# Short content hashes of each method's system prompt. Cached responses are
+# keyed on these, so editing a prompt retires everything cached under it.
+PROMPT_VERSIONS = {
+    "classify_intent": hashlib.sha256(INTENT_PROMPT.encode("utf-8")).hexdigest()[:12],
+    "parse": hashlib.sha256(PARSE_PROMPT.encode("utf-8")).hexdigest()[:12],
+    "classify_and_parse": hashlib.sha256(CLASSIFY_AND_PARSE_PROMPT.encode("utf-8")).hexdigest()[:12],
+    "summarize_articles": hashlib.sha256(
+        f"{SUMMARY_PROMPT}|{SUMMARY_TOKEN_BUDGET}".encode("utf-8")
+    ).hexdigest()[:12],
+    "extract_company_details": hashlib.sha256(COMPANY_PROMPT.encode("utf-8")).hexdigest()[:12],
+}
+
+TRADE_FIELDS = ["action", "symbol", "quantity", "price", "order_type", "account", "order_id"]
+
+
+def _normalize_trade_params(llm_output: dict) -> dict:
+    # normalize keys in case older versions use 'side'
+    if "side" in llm_output:
+        llm_output["action"] = llm_output.pop("side")
+
+    # ensure all required fields exist
+    for field in TRADE_FIELDS:
+        llm_output.setdefault(field, None)
+
+    return llm_output
+
+
+class OpenAILLM(LLMClient):
+    def __init__(self):
+        self.model = MODEL
+
+    @property
+    def client(self):
+        # Built (and openai imported) on the first request, not at startup.
+        return get_openai_client()
+
+    def prompt_version(self, method: str) -> str:
+        return PROMPT_VERSIONS.get(method, "unversioned")
+
+    def _complete(self, **kwargs):
+        with llm_request_slot():
+            return self.client.chat.completions.create(**kwargs)
+
+    def classify_intent(self, user_input: str) -> dict:
+        system_prompt = INTENT_PROMPT
+
+        response = self._complete(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+            ],
+            temperature=0
+        )
+
+        content = response.choices[0].message.content
+
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return FallbackResult(intent="unknown", confidence=0.0)
+
+
+    def parse(self, user_input: str) -> dict:
+            
+        system_prompt = PARSE_PROMPT
+
+        response = self._complete(
+            model=MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_input}
@@ -101,88 +205,94 @@ Rules:
             llm_output = json.loads(content)
         except json.JSONDecodeError:
             # fallback in case LLM returns invalid JSON
-            llm_output = {
-                "symbol": None,
-                "quantity": None,
-                "price": None,
-                "action": None,
-                "account": None
-            }
+            llm_output = FallbackResult(
+                symbol=None,
+                quantity=None,
+                price=None,
+                action=None,
+                account=None
+            )
+
+        return _normalize_trade_params(llm_output)
+
+    def classify_and_parse(self, user_input: str) -> dict:
+        system_prompt = CLASSIFY_AND_PARSE_PROMPT
+
+        response = self._complete(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input}
+            ],
+            temperature=0
+        )
 
-        # normalize keys in case older versions use 'side'
-        if "side" in llm_output:
-            llm_output["action"] = llm_output.pop("side")
+        content = response.choices[0].message.content.strip()
 
-        # ensure all required fields exist
-        for field in ["action", "symbol", "quantity", "price", "order_type", "account", "order_id"]:
-            llm_output.setdefault(field, None)
+        try:
+            result = json.loads(content)
+        except json.JSONDecodeError:
+            return FallbackResult(
+                intent="unknown",
+                confidence=0.0,
+                params=_normalize_trade_params({}),
+            )
+
+        params = result.get("params")
+        if not isinstance(params, dict):
+            params = {}
 
-        return llm_output
+        return {
+            "intent": result.get("intent", "unknown"),
+            "confidence": result.get("confidence", 0.0),
+            "params": _normalize_trade_params(params),
+        }
 
     def summarize_articles(self, articles: list[dict], query_hint: str | None = None) -> str:
         if not articles:
             return "I don't have any articles to summarize."
 
-        system_prompt = """
-You are a factual summarizer. Summarize only the information that is present in the provided articles.
-Do not include anything the articles do not explicitly state. Stick to neutral language and reference the article titles or sources when clarity helps.
-Respond with a short paragraph and up to five bullet points highlighting the main facts.
-"""
-
-        article_snippets = []
-        for idx, article in enumerate(articles[:6], start=1):
-            title = article.get("title", "Untitled")
-            source = article.get("source", {}).get("name") or article.get("source_name") or "Unknown source"
-            published = article.get("publishedAt") or article.get("published_at") or "Unknown date"
-            description = article.get("description") or article.get("summary") or ""
-            content = article.get("content") or ""
-            url = article.get("url") or article.get("link")
-
-            snippet_lines = [
-                f"{idx}. Title: {title}",
-                f"   Source: {source}",
-                f"   Published: {published}",
-            ]
-
-            if description:
-                snippet_lines.append(f"   Description: {description}")
-            if content:
-                snippet_lines.append(f"   Content excerpt: {content[:400]}")
-            if url:
-                snippet_lines.append(f"   URL: {url}")
-
-            article_snippets.append("\n".join(snippet_lines))
-
-        query_text = f" about {query_hint}" if query_hint else ""
-        user_prompt = (
-            f"Summarize the key facts from these articles{query_text}."
-            " Keep the summary factual and grounded in the information shown above."
-        )
-
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt + "\n\n" + "\n\n".join(article_snippets)},
-            ],
+        response = self._complete(
+            model=MODEL,
+            messages=self._summary_messages(articles, query_hint),
             temperature=0.2
         )
 
         return response.choices[0].message.content.strip()
 
+    def stream_summarize_articles(self, articles: list[dict], query_hint: str | None = None):
+        if not articles:
+            yield "I don't have any articles to summarize."
+            return
+
+        # The request slot is held until the stream is fully consumed.
+        with llm_request_slot():
+            stream = self.client.chat.completions.create(
+                model=MODEL,
+                messages=self._summary_messages(articles, query_hint),
+                temperature=0.2,
+                stream=True
+            )
+
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+    def _summary_messages(self, articles: list[dict], query_hint: str | None) -> list[dict]:
+        summary_prompt = build_summary_prompt(articles, query_hint)
+        return [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": summary_prompt["prompt"]},
+        ]
+
     def extract_company_details(self, user_input: str) -> dict:
-        system_prompt = """
-You are a metadata extractor for a trading research assistant.
-Return JSON ONLY:
-{
-  "company_name": "Full company name or null",
-  "company_symbol": "Ticker symbol in uppercase or null"
-}
-If the user mentions a company name or ticker anywhere in the text, capture it exactly as provided (symbol in uppercase). Otherwise return null values.
-"""
+        system_prompt = COMPANY_PROMPT
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
+        response = self._complete(
+            model=MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_input}
@@ -194,7 +304,7 @@ If the user mentions a company name or ticker anywhere in the text, capture it e
         try:
             result = json.loads(content)
         except json.JSONDecodeError:
-            return {"company_name": None, "company_symbol": None}
+            return FallbackResult(company_name=None, company_symbol=None)
 
         return {
             "company_name": result.get("company_name"),
@@ -0,0 +1,233 @@
+import logging
+import math
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_TOKEN_BUDGET = int(os.environ.get("SUMMARY_TOKEN_BUDGET", "1200"))
+MAX_SUMMARY_ARTICLES = int(os.environ.get("MAX_SUMMARY_ARTICLES", "8"))
+# A snippet is only worth including if it can show more than its header.
+MIN_BODY_TOKENS = 20
+
+BOILERPLATE_PATTERNS = [
+    re.compile(r"\[\+\d+ chars\]"),
+    re.compile(r"\b(?:read more|click here|continue reading|subscribe now|sign up for [^.]*)\b[.…]*", re.IGNORECASE),
+    re.compile(r"\ball rights reserved\.?", re.IGNORECASE),
+    re.compile(r"^\s*\(?(?:reuters|bloomberg|ap)\)?\s*[-—–]\s*", re.IGNORECASE),
+]
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "tokens_total": 0, "last_tokens": 0, "last_articles": 0}
+
+
+def _get_encoding():
+    # tiktoken is optional, and loading an encoding may download its BPE
+    # file, so it happens on the first count rather than at import.
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:  # not installed or not loadable; fall back to an estimate
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly one token per four characters of a word, one per punctuation mark.
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PIECES.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(" ".join(words[:mid])) + 1 <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) + "…" if lo else ""
+
+
+def _published_at(article: dict):
+    raw = (
+        article.get("pubDate")
+        or article.get("publishedAt")
+        or article.get("published_at")
+        or article.get("addDate")
+    )
+    if not raw:
+        return None
+    try:
+        published = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published
+
+
+def _query_terms(query_hint: str | None) -> set[str]:
+    stop_words = {"stock", "stocks", "news", "the", "and", "for", "about", "latest", "on", "of"}
+    return {
+        term for term in re.findall(r"[a-z0-9]+", (query_hint or "").lower())
+        if len(term) > 1 and term not in stop_words
+    }
+
+
+def _rank_articles(articles: list[dict], query_hint: str | None) -> list[dict]:
+    """
+    Orders articles by query relevance first, then recency.
+    """
+    terms = _query_terms(query_hint)
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+
+    def score(article):
+        text = " ".join(
+            str(article.get(field) or "") for field in ("title", "description", "summary")
+        ).lower()
+        relevance = sum(1 for term in terms if term in text)
+        return relevance, _published_at(article) or epoch
+
+    return sorted(articles, key=score, reverse=True)
+
+
+def _clean(text: str) -> str:
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub("", text)
+    return " ".join(text.split())
+
+
+def _strip_repeated_sentences(bodies: list[str]) -> list[str]:
+    # A sentence repeated across articles (a shared wire fact or a publisher
+    # disclaimer) only needs to be shown once: keep its first occurrence.
+    seen = set()
+    stripped = []
+    for body in bodies:
+        kept = []
+        for sentence in _SENTENCE_SPLIT.split(body):
+            if sentence and sentence not in seen:
+                seen.add(sentence)
+                kept.append(sentence)
+        stripped.append(" ".join(kept))
+    return stripped
+
+
+def _snippet(header: str, body: str, body_limit: int) -> str:
+    excerpt = truncate_to_tokens(body, body_limit) if body else ""
+    return f"{header}\n   Excerpt: {excerpt}" if excerpt else header
+
+
+def _join_prompt(user_prompt: str, separator: str, snippets: list) -> str:
+    return separator.join([user_prompt] + [snippet[-1] for snippet in snippets])
+
+
+def build_summary_prompt(articles: list[dict], query_hint: str | None = None,
+                         token_budget: int = SUMMARY_TOKEN_BUDGET) -> dict:
+    """
+    Builds the user prompt for summarize_articles in at most `token_budget`
+    tokens (instructions included). Returns the prompt text, its token count and
+    how many articles made it in.
+    """
+    ranked = []
+    seen = set()
+    for article in _rank_articles(articles, query_hint):
+        identity = article.get("url") or article.get("link") or article.get("title")
+        if identity in seen:
+            continue
+        seen.add(identity)
+        ranked.append(article)
+    ranked = ranked[:MAX_SUMMARY_ARTICLES]
+
+    bodies = []
+    for article in ranked:
+        description = _clean(article.get("description") or article.get("summary") or "")
+        content = _clean(article.get("content") or "")
+        if description and content.startswith(description):
+            content = content[len(description):].strip()
+        bodies.append(" ".join(part for part in (description, content) if part))
+    bodies = _strip_repeated_sentences(bodies)
+
+    query_text = f" about {query_hint}" if query_hint else ""
+    user_prompt = (
+        f"Summarize the key facts from these articles{query_text}."
+        " Keep the summary factual and grounded in the information shown above."
+    )
+
+    separator = "\n\n"
+    remaining = token_budget - count_tokens(user_prompt) - count_tokens(separator)
+    snippets = []
+    for idx, (article, body) in enumerate(zip(ranked, bodies)):
+        source = (article.get("source") or {}).get("name") or article.get("source_name") or "Unknown source"
+        published = _published_at(article)
+        header_lines = [
+            f"{len(snippets) + 1}. Title: {article.get('title') or 'Untitled'}",
+            f"   Source: {source}",
+            f"   Published: {published.date().isoformat() if published else 'Unknown date'}",
+        ]
+        url = article.get("url") or article.get("link")
+        if url:
+            header_lines.append(f"   URL: {url}")
+        header = "\n".join(header_lines)
+
+        header_tokens = count_tokens(header) + count_tokens(separator)
+        if header_tokens + MIN_BODY_TOKENS > remaining:
+            break
+
+        # Split what is left evenly over the articles still to place, so
+        # one long article can't crowd out the rest; unused share carries on.
+        share = remaining // (len(ranked) - idx)
+        body_limit = min(max(share - header_tokens, MIN_BODY_TOKENS), remaining - header_tokens - 2)
+
+        snippet = _snippet(header, body, body_limit)
+        snippets.append([header, body, body_limit, snippet])
+        remaining -= count_tokens(snippet) + count_tokens(separator)
+
+    # Tokens don't add up exactly across joins, so check the assembled
+    # prompt and shrink (or drop) the last snippets until it fits.
+    prompt = _join_prompt(user_prompt, separator, snippets)
+    tokens = count_tokens(prompt)
+    while tokens > token_budget and snippets:
+        header, body, body_limit, _ = snippets[-1]
+        body_limit -= tokens - token_budget + 1
+        if body and body_limit >= MIN_BODY_TOKENS:
+            snippets[-1] = [header, body, body_limit, _snippet(header, body, body_limit)]
+        else:
+            snippets.pop()
+        prompt = _join_prompt(user_prompt, separator, snippets)
+        tokens = count_tokens(prompt)
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["tokens_total"] += tokens
+        _stats["last_tokens"] = tokens
+        _stats["last_articles"] = len(snippets)
+    logger.info("summary prompt: %d tokens, %d/%d articles", tokens, len(snippets), len(articles))
+
+    return {"prompt": prompt, "tokens": tokens, "articles_used": len(snippets)}
+
+
+def get_prompt_token_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,85 @@
+import os
+import threading
+from contextlib import contextmanager
+
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", str(LLM_MAX_CONCURRENCY)))
+
+_client_lock = threading.Lock()
+_openai_client = None
+
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_request_hooks = []
+_stats_lock = threading.Lock()
+_stats = {"in_flight": 0, "waiting": 0, "completed": 0}
+
+
+def get_openai_client():
+    """
+    Returns the one OpenAI client for the process, so every LLM call shares
+    the same keep-alive connection pool and timeouts.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("OPENAI_API_KEY not set")
+
+                import httpx
+                from openai import DefaultHttpxClient, OpenAI
+
+                _openai_client = OpenAI(
+                    api_key=api_key,
+                    timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT),
+                    max_retries=LLM_MAX_RETRIES,
+                    http_client=DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=LLM_POOL_SIZE,
+                            max_keepalive_connections=LLM_POOL_SIZE,
+                        )
+                    ),
+                )
+    return _openai_client
+
+
+def add_request_hook(hook):
+    """
+    Registers hook() to run before every request that actually goes to the
+    model (cached answers never get here). A hook may raise to refuse it.
+    """
+    if hook not in _request_hooks:
+        _request_hooks.append(hook)
+
+
+@contextmanager
+def llm_request_slot():
+    """
+    Holds one of the LLM_MAX_CONCURRENCY process-wide request slots for the
+    duration of an LLM call, waiting if all are taken.
+    """
+    for hook in _request_hooks:
+        hook()
+
+    with _stats_lock:
+        _stats["waiting"] += 1
+    _slots.acquire()
+    with _stats_lock:
+        _stats["waiting"] -= 1
+        _stats["in_flight"] += 1
+    try:
+        yield
+    finally:
+        with _stats_lock:
+            _stats["in_flight"] -= 1
+            _stats["completed"] += 1
+        _slots.release()
+
+
+def get_llm_stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "max_concurrency": LLM_MAX_CONCURRENCY}
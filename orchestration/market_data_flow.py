@@ -1,10 +1,19 @@
+import os
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from services.market_data import fetch_market_data, fetch_30_day_history, bars_to_dataframe
+from services.market_data import fetch_market_data, fetch_30_day_history
 
 
 FIELD_PROMPT = "Which stock symbol would you like market data for?"
 
+# How long to wait for the chart history once the quote is ready; past this
+# the quote is answered without a chart.
+HISTORY_WAIT_SECONDS = float(os.environ.get("HISTORY_WAIT_SECONDS", "3"))
+
+_fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-data")
+
 
 def format_price(value):
     if value is None:
@@ -60,22 +69,12 @@ def handle_market_data_flow(parsed_params, user_input):
 
     symbol = trade_state["symbol"]
 
+    history_future = _fetch_executor.submit(fetch_30_day_history, symbol)
+
     try:
         data = fetch_market_data(symbol)
-        bars = fetch_30_day_history(symbol)
-        df = bars_to_dataframe(bars)
-
-        sorted_df = df.sort_index()
-        chart_info = {
-            "symbol": symbol,
-            "df": sorted_df,
-            "key": f"market_chart_{symbol}_{int(time.time())}",
-        }
-        st.session_state.last_chart = sorted_df
-        st.session_state.last_chart_symbol = symbol
-        st.session_state.last_chart_key = chart_info["key"]
-        st.session_state.pending_market_data_chart = chart_info
     except Exception as exc:
+        history_future.cancel()
         trade_state.pop("symbol", None)
         trade_state.pop("expected_field", None)
         return (
@@ -83,5 +82,23 @@ def handle_market_data_flow(parsed_params, user_input):
             f"{str(exc)}"
         )
 
+    try:
+        bars = history_future.result(timeout=HISTORY_WAIT_SECONDS)
+    except Exception:
+        # The quote is still useful on its own; skip the chart this turn.
+        bars = None
+
+    if bars is not None and len(bars):
+        chart_info = {
+            "symbol": symbol,
+            "bars": bars,
+            # Also the widget key, so it must stay unique for repeat quotes
+            # of one symbol within the same second.
+            "key": f"market_chart_{symbol}_{int(time.time())}_{uuid.uuid4().hex[:8]}",
+        }
+        st.session_state.last_chart_symbol = symbol
+        st.session_state.last_chart_key = chart_info["key"]
+        st.session_state.pending_market_data_chart = chart_info
+
     st.session_state.trade_state = {}
     return summarize_market_data(data)
@@ -1,3 +1,7 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import streamlit as st
@@ -5,7 +9,14 @@ import streamlit as st
 from llm import get_llm_client
 from services.news_service import NewsAPIError, fetch_news_articles
 
-llm = get_llm_client()
+logger = logging.getLogger(__name__)
+
+# Pipelined mode starts a news fetch on the raw query while the company is
+# being extracted, and keeps it if extraction finds no company.
+RESEARCH_PIPELINE = os.environ.get("RESEARCH_PIPELINE", "on") != "off"
+ARTICLE_LIMIT = 5
+
+_research_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="research")
 
 
 def _derive_search_query(user_input: str, company_details: dict) -> tuple[str, str | None, str | None]:
@@ -73,34 +84,103 @@ def _format_sources(articles: list[dict]) -> list[str]:
     return lines
 
 
-def handle_market_research_flow(user_input: str):
-    company_details = llm.extract_company_details(user_input)
+def _fetch_articles(query: str, symbol: str | None, company_name: str | None) -> list[dict]:
+    return fetch_news_articles(
+        query, limit=ARTICLE_LIMIT, company_symbol=symbol, company_name=company_name
+    )
+
+
+def _gather_articles_sequential(user_input: str, timings: dict):
+    started = time.perf_counter()
+    company_details = get_llm_client().extract_company_details(user_input)
+    timings["extract_ms"] = (time.perf_counter() - started) * 1000
+
+    query, symbol, company_name = _derive_search_query(user_input, company_details)
+
+    started = time.perf_counter()
+    articles = _fetch_articles(query, symbol, company_name)
+    timings["fetch_ms"] = (time.perf_counter() - started) * 1000
+    return query, articles
+
+
+def _gather_articles_pipelined(user_input: str, timings: dict):
+    started = time.perf_counter()
+    raw_query, _, _ = _derive_search_query(user_input, {})
+    speculative = _research_executor.submit(_fetch_articles, raw_query, None, None)
+
+    company_details = get_llm_client().extract_company_details(user_input)
+    timings["extract_ms"] = (time.perf_counter() - started) * 1000
+
     query, symbol, company_name = _derive_search_query(user_input, company_details)
+
+    fetch_started = time.perf_counter()
+    if symbol or company_name:
+        # The scoped search replaces the speculative one; its result (or
+        # error) is simply discarded.
+        speculative.cancel()
+        articles = _fetch_articles(query, symbol, company_name)
+        timings["speculative_used"] = False
+    else:
+        articles = speculative.result()
+        timings["speculative_used"] = True
+    timings["fetch_ms"] = (time.perf_counter() - fetch_started) * 1000
+    return query, articles
+
+
+def handle_market_research_flow(user_input: str):
+    timings = {"pipelined": RESEARCH_PIPELINE}
+    started = time.perf_counter()
+    gather = _gather_articles_pipelined if RESEARCH_PIPELINE else _gather_articles_sequential
+
     try:
-        articles = fetch_news_articles(
-            query, limit=5, company_symbol=symbol, company_name=company_name
-        )
+        query, articles = gather(user_input, timings)
     except NewsAPIError as exc:
         st.session_state.trade_state = {}
         return f"Sorry, I couldn't load news right now. {str(exc)}"
 
+    timings["gather_ms"] = (time.perf_counter() - started) * 1000
+
     if not articles:
+        _log_timings(timings)
         st.session_state.trade_state = {}
         return f"I couldn't find any news for \"{query}\". Try another symbol or topic."
 
-    try:
-        summary = llm.summarize_articles(articles, query)
-    except Exception as exc:
-        st.session_state.trade_state = {}
-        return f"I couldn't summarize the articles right now. {str(exc)}"
-
     source_lines = _format_sources(articles)
 
     st.session_state.trade_state = {}
+    return _stream_research_response(articles, query, source_lines, timings)
+
+
+def _log_timings(timings: dict):
+    logger.info(
+        "market research timings: %s",
+        ", ".join(
+            f"{name}={value:.0f}" if isinstance(value, float) else f"{name}={value}"
+            for name, value in timings.items()
+        ),
+    )
+
+
+def _stream_research_response(articles: list[dict], query: str, source_lines: list[str], timings: dict):
+    """
+    Yields the research answer as markdown chunks so the UI can show the
+    summary while it is still being generated.
+    """
+    yield f"### Market Research — {query}\n\n"
+
+    started = time.perf_counter()
+    try:
+        for chunk in get_llm_client().stream_summarize_articles(articles, query):
+            if "first_token_ms" not in timings:
+                timings["first_token_ms"] = (time.perf_counter() - started) * 1000
+            yield chunk
+    except Exception as exc:
+        yield f"I couldn't summarize the articles right now. {str(exc)}"
+    timings["summarize_ms"] = (time.perf_counter() - started) * 1000
+    _log_timings(timings)
+
     lines = [
-        f"### Market Research — {query}",
         "",
-        summary,
         "",
         "**Sources:**",
     ]
@@ -108,4 +188,4 @@ def handle_market_research_flow(user_input: str):
     lines.append("")
     lines.append("Let me know if you want to see news about any other company.")
 
-    return "\n".join(lines).strip()
+    yield "\n".join(lines)
@@ -1,37 +1,85 @@
+import os
+import threading
+
 from llm import get_llm_client
+from llm.intent_rules import classify_intent_rules
+from llm.registry import add_request_hook
 from orchestration.market_data_flow import handle_market_data_flow
 from orchestration.market_research_flow import handle_market_research_flow
 from orchestration.orders_flow import handle_view_orders_flow
 from orchestration.portfolio_flow import handle_view_portfolio_flow
-from orchestration.trade_flow import handle_trade_flow
+from orchestration.trade_flow import handle_trade_flow, parse_reply_locally
+from services.rate_limiter import RateLimitExceeded, get_rate_limiter
 import streamlit as st
 
-MAX_LLM_CALLS = 30
 MAX_CHARS = 200
 
-llm = get_llm_client()
+# Rule-based intents at or above this confidence skip the LLM classifier.
+INTENT_FAST_PATH_THRESHOLD = float(os.environ.get("INTENT_FAST_PATH_THRESHOLD", "0.85"))
 
+_intent_stats_lock = threading.Lock()
+_intent_stats = {"fast_path": 0, "llm": 0}
 
-def handle_user_input(user_input: str):
-    if "llm_calls" not in st.session_state:
-        st.session_state.llm_calls = 0
 
-    if st.session_state.llm_calls >= MAX_LLM_CALLS:
-        return (
-            "⚠️ You've reached the maximum number of AI requests "
-            "for this session. Please refresh the app to start over."
-        )
+def _charge_llm_request():
+    # Charged per request that reaches the model, so answers served from the
+    # LLM caches don't use up the caller's "llm" budget.
+    get_rate_limiter().check("llm")
+
+
+add_request_hook(_charge_llm_request)
 
-    # count this interaction
-    st.session_state.llm_calls += 1
 
+def route_intent(user_input: str) -> tuple[dict, dict | None]:
+    """
+    Returns the intent result and, when the LLM was consulted, the trade
+    parameters it extracted in the same call (None on the rule fast path).
+    """
+    result = classify_intent_rules(user_input)
+    parsed = None
+    if result["confidence"] >= INTENT_FAST_PATH_THRESHOLD:
+        route = "fast_path"
+    else:
+        route = "llm"
+        combined = get_llm_client().classify_and_parse(user_input)
+        parsed = combined.get("params")
+        result = {"intent": combined.get("intent"), "confidence": combined.get("confidence")}
+
+    with _intent_stats_lock:
+        _intent_stats[route] += 1
+    return result, parsed
+
+
+def get_intent_routing_stats() -> dict:
+    with _intent_stats_lock:
+        stats = dict(_intent_stats)
+    total = stats["fast_path"] + stats["llm"]
+    stats["fast_path_share"] = stats["fast_path"] / total if total else 0.0
+    return stats
+
+
+def handle_user_input(user_input: str):
+    try:
+        return _route_user_input(user_input)
+    except RateLimitExceeded as exc:
+        if exc.bucket == "llm":
+            return (
+                "⚠️ You've reached the maximum number of AI requests for now. "
+                f"Please try again in {exc.retry_after:.0f} seconds."
+            )
+        return f"⚠️ Too many requests right now. Please try again in {exc.retry_after:.0f} seconds."
+
+
+def _route_user_input(user_input: str):
     # 🔑 Step 1: if a trade is in progress, continue it
     trade_state = st.session_state.get("trade_state", {})
 
     if trade_state and trade_state.get("flow") == "market_data":
         if len(user_input) > MAX_CHARS:
             return "Please keep your message under 500 characters."
-        parsed = llm.parse(user_input)
+        parsed = parse_reply_locally(trade_state, user_input)
+        if parsed is None:
+            parsed = get_llm_client().parse(user_input)
         return handle_market_data_flow(parsed, user_input)
 
     if trade_state and trade_state.get("flow") == "market_research":
@@ -42,27 +90,32 @@ def handle_user_input(user_input: str):
     ):
         if len(user_input) > MAX_CHARS:
             return "Please keep your message under 500 characters."
-        parsed = llm.parse(user_input)
+        parsed = parse_reply_locally(trade_state, user_input)
+        if parsed is None:
+            parsed = get_llm_client().parse(user_input)
         return handle_trade_flow(parsed, user_input)
 
     # Step 2: classify intent ONLY if no active trade
-    intent_result = llm.classify_intent(user_input)
+    intent_result, parsed = route_intent(user_input)
     intent = intent_result.get("intent")
 
     # Step 3: start new trade flow
     if intent == "place_trade":
         st.session_state.trade_state = {"flow": "place_trade"}
-        parsed = llm.parse(user_input)
+        if parsed is None:
+            parsed = get_llm_client().parse(user_input)
         return handle_trade_flow(parsed, user_input)
 
     if intent == "cancel_order":
         st.session_state.trade_state = {"flow": "cancel_order"}
-        parsed = llm.parse(user_input)
+        if parsed is None:
+            parsed = get_llm_client().parse(user_input)
         return handle_trade_flow(parsed, user_input)
 
     if intent == "market_data":
         st.session_state.trade_state = {"flow": "market_data"}
-        parsed = llm.parse(user_input)
+        if parsed is None:
+            parsed = get_llm_client().parse(user_input)
         return handle_market_data_flow(parsed, user_input)
 
     if intent == "market_research":
@@ -1,12 +1,6 @@
 import streamlit as st
-from services.broker_app import list_accounts, list_positions
-
-
-def _get_primary_account_id():
-    accounts = list_accounts()
-    if not accounts:
-        raise RuntimeError("No trading accounts could be loaded.")
-    return accounts[0]["id"]
+from services.account_service import get_primary_account_id
+from services.broker_app import list_positions
 
 
 def _safe_float(value):
@@ -78,7 +72,7 @@ def handle_view_portfolio_flow():
     st.session_state.trade_state = {}
 
     try:
-        account_id = _get_primary_account_id()
+        account_id = get_primary_account_id()
         positions = list_positions(account_id)
     except Exception as exc:
         return (
@@ -1,6 +1,9 @@
+import re
+
 import streamlit as st
 from services.trade_api import TradeService
-from services.broker_app import list_accounts, list_orders
+from services.account_service import get_primary_account_id
+from services.broker_app import list_orders
 
 trade_service = TradeService()
 
@@ -24,6 +27,9 @@ FIELD_PROMPTS = {
     "order_id": "Please provide the order ID you want to cancel."
 }
 
+TRADE_PARAM_FIELDS = ["symbol", "quantity", "price", "action", "order_type", "account", "order_id"]
+TICKER_PATTERN = re.compile(r"\$?[A-Za-z]{1,5}(?:\.[A-Za-z])?")
+
 AFFIRMATIVE_PREFIXES = ("yes", "y", "sure", "confirm", "yep", "ok", "okay", "go ahead", "please do")
 NEGATIVE_PREFIXES = ("no", "nah", "cancel", "stop", "don't", "do not", "not now")
 
@@ -69,11 +75,6 @@ def coerce_value(field, user_input):
     return user_input
 
 
-def get_primary_account_id():
-    accounts = list_accounts()
-    return accounts[0]["id"]
-
-
 def find_open_orders_by_symbol(symbol):
     account_id = get_primary_account_id()
     orders = list_orders(account_id, limit=100, status="open")
@@ -162,6 +163,39 @@ def looks_like_negation(text):
     return any(normalized.startswith(prefix) for prefix in NEGATIVE_PREFIXES)
 
 
+def parse_reply_locally(trade_state, user_input):
+    """
+    Handles slot-filling replies ("10", "AAPL", "limit", "yes") without the
+    LLM. Returns an all-None params dict when the reply is fully covered by
+    the confirmation check or by coerce_value on the expected field, and None
+    when it may carry more information and should go through llm.parse.
+    """
+    text = (user_input or "").strip()
+    if not text:
+        return None
+
+    empty_params = dict.fromkeys(TRADE_PARAM_FIELDS)
+
+    if trade_state.get("awaiting_confirmation"):
+        if looks_like_affirmation(text) or looks_like_negation(text):
+            return empty_params
+        return None
+
+    field = trade_state.get("expected_field")
+    if not field or len(text.split()) > 1:
+        return None
+
+    if field == "symbol" and not TICKER_PATTERN.fullmatch(text):
+        return None
+
+    try:
+        coerce_value(field, text)
+    except ValueError:
+        return None
+
+    return empty_params
+
+
 def summarize_trade(trade):
     action = trade["action"].capitalize()
     symbol = trade["symbol"]
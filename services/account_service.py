@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+from services.broker_app import list_accounts
+
+ACCOUNTS_TTL_SECONDS = float(os.environ.get("ACCOUNTS_TTL_SECONDS", "300"))
+
+_lock = threading.Lock()
+_accounts = None
+_fetched_at = 0.0
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_accounts() -> list[dict]:
+    """
+    Returns the broker account list, fetching it at most once per TTL for the
+    whole process. Concurrent callers on a miss wait for the single fetch.
+    """
+    global _accounts, _fetched_at
+
+    with _lock:
+        if _accounts is not None and time.monotonic() - _fetched_at < ACCOUNTS_TTL_SECONDS:
+            _stats["hits"] += 1
+            return _accounts
+
+        _stats["misses"] += 1
+        accounts = list_accounts()
+        if accounts:
+            _accounts = accounts
+            _fetched_at = time.monotonic()
+        return accounts
+
+
+def get_primary_account_id() -> str:
+    accounts = get_accounts()
+    if not accounts:
+        raise RuntimeError("No trading accounts could be loaded.")
+    return accounts[0]["id"]
+
+
+def invalidate_accounts():
+    global _accounts, _fetched_at
+    with _lock:
+        _accounts = None
+        _fetched_at = 0.0
+
+
+def get_account_cache_stats() -> dict:
+    with _lock:
+        return {
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "cached": _accounts is not None,
+            "age_seconds": time.monotonic() - _fetched_at if _accounts is not None else None,
+        }
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: merges are only serialized within a process
+    fcntl = None
+
+BAR_STORE_DIR = os.environ.get("BAR_STORE_DIR", os.path.join("data", "bars"))
+
+# One row per bar, sorted by timestamp (UTC epoch nanoseconds).
+BAR_DTYPE = np.dtype([
+    ("t", "<i8"),
+    ("o", "<f8"),
+    ("h", "<f8"),
+    ("l", "<f8"),
+    ("c", "<f8"),
+    ("v", "<f8"),
+    ("n", "<i8"),
+    ("vw", "<f8"),
+])
+
+_FIELD_DEFAULTS = {"o": np.nan, "h": np.nan, "l": np.nan, "c": np.nan, "v": 0.0, "n": 0, "vw": np.nan}
+
+
+def bars_to_records(bars) -> np.ndarray:
+    """
+    Builds a BAR_DTYPE array column by column from Alpaca bar payloads,
+    without creating per-row tuples or an intermediate DataFrame. Alpaca
+    returns bars in ascending order, so sorting only happens if it did not.
+    """
+    count = len(bars)
+    records = np.empty(count, dtype=BAR_DTYPE)
+    records["t"] = np.array(
+        [bar["t"].rstrip("Z") for bar in bars], dtype="datetime64[ns]"
+    ).astype(np.int64)
+    for field, default in _FIELD_DEFAULTS.items():
+        records[field] = np.fromiter(
+            (bar.get(field, default) for bar in bars),
+            dtype=BAR_DTYPE[field],
+            count=count,
+        )
+
+    if count > 1 and np.any(np.diff(records["t"]) < 0):
+        records.sort(order="t")
+    return records
+
+
+def date_to_ns(value: date) -> int:
+    return int(np.datetime64(value.isoformat(), "ns").astype(np.int64))
+
+
+@contextmanager
+def _file_lock(path: str):
+    # Exclusive advisory lock shared by every process using the store.
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class BarStore:
+    """
+    On-disk OHLCV store with one memory-mapped .npy file per symbol and
+    timeframe, plus a small JSON sidecar recording which dates have been
+    fetched. Writes replace the file atomically, so readers in other
+    processes always see a complete file, and merges hold a per-symbol file
+    lock so concurrent writers in different processes don't lose bars.
+    """
+
+    def __init__(self, root: str = BAR_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def read(self, symbol: str, timeframe: str, start_ns: int | None = None, end_ns: int | None = None) -> np.ndarray:
+        path = self._data_path(symbol, timeframe)
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=BAR_DTYPE)
+
+        mapped = np.load(path, mmap_mode="r")
+        lo = 0 if start_ns is None else np.searchsorted(mapped["t"], start_ns, side="left")
+        hi = len(mapped) if end_ns is None else np.searchsorted(mapped["t"], end_ns, side="right")
+        # Copy the slice out so the file isn't held open (Windows can't
+        # replace a mapped file).
+        records = np.array(mapped[lo:hi])
+        del mapped
+        return records
+
+    def coverage(self, symbol: str, timeframe: str) -> tuple[date, date] | None:
+        meta = self._read_meta(symbol, timeframe)
+        if meta is None:
+            return None
+        return date.fromisoformat(meta["covered_from"]), date.fromisoformat(meta["covered_to"])
+
+    def synced_at(self, symbol: str, timeframe: str) -> float | None:
+        """
+        Epoch seconds of the last merge for the symbol, or None if unknown.
+        """
+        meta = self._read_meta(symbol, timeframe)
+        return meta.get("synced_at") if meta else None
+
+    def merge(self, symbol: str, timeframe: str, records: np.ndarray, covered_from: date, covered_to: date):
+        """
+        Adds freshly fetched bars, replacing any stored bar with the same
+        timestamp, and widens the recorded coverage to include the range.
+
+        The data file is replaced before the coverage file, under a lock
+        held across processes, so coverage never claims bars the data file
+        doesn't have.
+        """
+        os.makedirs(self._dir(timeframe), exist_ok=True)
+        lock_path = os.path.join(self._dir(timeframe), f"{symbol.upper()}.lock")
+        with self._lock, _file_lock(lock_path):
+            existing = self.read(symbol, timeframe)
+            if len(existing):
+                keep = ~np.isin(existing["t"], records["t"])
+                merged = np.concatenate([existing[keep], records.astype(BAR_DTYPE)])
+                merged.sort(order="t")
+            else:
+                merged = records.astype(BAR_DTYPE)
+
+            current = self.coverage(symbol, timeframe)
+            if current:
+                covered_from = min(covered_from, current[0])
+                covered_to = max(covered_to, current[1])
+
+            data_path = self._data_path(symbol, timeframe)
+            tmp_path = f"{data_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as handle:
+                np.save(handle, merged)
+            os.replace(tmp_path, data_path)
+
+            meta_path = self._meta_path(symbol, timeframe)
+            tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as handle:
+                json.dump({
+                    "covered_from": covered_from.isoformat(),
+                    "covered_to": covered_to.isoformat(),
+                    "synced_at": time.time(),
+                }, handle)
+            os.replace(tmp_meta, meta_path)
+
+    def _read_meta(self, symbol: str, timeframe: str) -> dict | None:
+        path = self._meta_path(symbol, timeframe)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def _dir(self, timeframe: str) -> str:
+        return os.path.join(self.root, timeframe)
+
+    def _data_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self._dir(timeframe), f"{symbol.upper()}.npy")
+
+    def _meta_path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self._dir(timeframe), f"{symbol.upper()}.json")
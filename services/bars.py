@@ -0,0 +1,92 @@
+import numpy as np
+
+from services.bar_store import BAR_DTYPE
+
+
+class Bars:
+    """
+    Time-sorted OHLCV bars backed by one BAR_DTYPE structured array.
+
+    The array is always in ascending time order, so consumers never need to
+    sort it. Column accessors are views into the array, not copies.
+    """
+
+    __slots__ = ("symbol", "timeframe", "records")
+
+    def __init__(self, symbol: str, records: np.ndarray, timeframe: str = "1Day"):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.records = records
+
+    @classmethod
+    def empty(cls, symbol: str, timeframe: str = "1Day") -> "Bars":
+        return cls(symbol, np.zeros(0, dtype=BAR_DTYPE), timeframe)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def t(self) -> np.ndarray:
+        return self.records["t"]
+
+    @property
+    def o(self) -> np.ndarray:
+        return self.records["o"]
+
+    @property
+    def h(self) -> np.ndarray:
+        return self.records["h"]
+
+    @property
+    def l(self) -> np.ndarray:
+        return self.records["l"]
+
+    @property
+    def c(self) -> np.ndarray:
+        return self.records["c"]
+
+    @property
+    def v(self) -> np.ndarray:
+        return self.records["v"]
+
+    def timestamps(self) -> np.ndarray:
+        """
+        Bar times as datetime64[ns] (UTC), viewing the stored int64 column.
+        """
+        return self.records["t"].view("datetime64[ns]")
+
+    def downsample(self, max_points: int) -> "Bars":
+        """
+        Merges runs of consecutive bars so at most `max_points` remain: first
+        open, highest high, lowest low, last close and summed volume per run.
+        Returns self when already small enough.
+        """
+        count = len(self.records)
+        if count <= max_points:
+            return self
+
+        step = -(-count // max_points)
+        starts = np.arange(0, count, step)
+        ends = np.append(starts[1:], count) - 1
+
+        records = np.zeros(len(starts), dtype=BAR_DTYPE)
+        records["t"] = self.records["t"][starts]
+        records["o"] = self.records["o"][starts]
+        records["h"] = np.maximum.reduceat(self.records["h"], starts)
+        records["l"] = np.minimum.reduceat(self.records["l"], starts)
+        records["c"] = self.records["c"][ends]
+        records["v"] = np.add.reduceat(self.records["v"], starts)
+        records["n"] = np.add.reduceat(self.records["n"], starts)
+        records["vw"] = np.nan
+        return Bars(self.symbol, records, self.timeframe)
+
+    def to_dataframe(self):
+        """
+        Wraps the columns in a DataFrame indexed by UTC time without copying
+        the column data.
+        """
+        import pandas as pd
+
+        index = pd.DatetimeIndex(self.timestamps(), name="t").tz_localize("UTC")
+        columns = {name: self.records[name] for name in BAR_DTYPE.names if name != "t"}
+        return pd.DataFrame(columns, index=index, copy=False)
@@ -1,7 +1,9 @@
 # services/broker_app.py
 import os
-import requests
 from dotenv import load_dotenv
+
+from services import http_client
+from services.rate_limiter import get_rate_limiter
 #from alpaca.broker.client import BrokerClient
 #from alpaca.broker.requests import MarketOrderRequest, LimitOrderRequest
 #from alpaca.trading.enums import OrderSide, TimeInForce
@@ -11,7 +13,11 @@ load_dotenv()
 BROKER_API_KEY = os.environ.get("ALPACA_API_KEY")
 BROKER_SECRET_KEY = os.environ.get("ALPACA_SECRET_KEY")
 
-BASE_URL = "https://broker-api.sandbox.alpaca.markets/v1"
+BASE_URL = os.environ.get("BROKER_BASE_URL", "https://broker-api.sandbox.alpaca.markets/v1")
+BROKER_POOL_SIZE = int(os.environ.get("BROKER_POOL_SIZE", "10"))
+BROKER_REQUESTS_PER_MINUTE = float(os.environ.get("BROKER_REQUESTS_PER_MINUTE", "200"))
+
+http_client.mount_host(BASE_URL, pool_maxsize=BROKER_POOL_SIZE, requests_per_minute=BROKER_REQUESTS_PER_MINUTE)
 
 HEADERS = {
     "APCA-API-KEY-ID": BROKER_API_KEY,
@@ -20,14 +26,16 @@ HEADERS = {
 }
 
 def list_accounts():
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/accounts"
-    response = requests.get(url, headers=HEADERS)
+    response = http_client.get(url, headers=HEADERS)
     response.raise_for_status()  # raise exception if unauthorized or failed
     return response.json()  # returns a list of account dicts
 
 def get_account(account_id):
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/accounts/{account_id}"
-    response = requests.get(url, headers=HEADERS)
+    response = http_client.get(url, headers=HEADERS)
     response.raise_for_status()
     return response.json()
 
@@ -37,6 +45,7 @@ def get_account(account_id):
 #    return get_account(account_id)
 
 def place_order(account_id, symbol, quantity, side, order_type="market", price=None):
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/trading/accounts/{account_id}/orders"
 
     order_data = {
@@ -50,12 +59,13 @@ def place_order(account_id, symbol, quantity, side, order_type="market", price=N
     if order_type.lower() == "limit" and price:
         order_data["limit_price"] = str(price)
 
-    response = requests.post(url, json=order_data, headers=HEADERS)
+    response = http_client.post(url, json=order_data, headers=HEADERS, priority=http_client.PRIORITY_HIGH)
     response.raise_for_status()
 
     return response.json()
 
 def list_orders(account_id, limit=5, status="all"):
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/trading/accounts/{account_id}/orders"
 
     params = {
@@ -64,25 +74,28 @@ def list_orders(account_id, limit=5, status="all"):
         "limit": limit
     }
 
-    response = requests.get(url, headers=HEADERS, params=params)
+    response = http_client.get(url, headers=HEADERS, params=params)
     response.raise_for_status()
     return response.json()
 
 def list_positions(account_id):
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/trading/accounts/{account_id}/positions"
-    response = requests.get(url, headers=HEADERS)
+    response = http_client.get(url, headers=HEADERS)
     response.raise_for_status()
     return response.json()
 
 def get_trading_account_details(account_id):
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/trading/accounts/{account_id}/account"
-    response = requests.get(url, headers=HEADERS)
+    response = http_client.get(url, headers=HEADERS)
     response.raise_for_status()
     return response.json()
 
 def cancel_order(account_id, order_id):
+    get_rate_limiter().check("broker")
     url = f"{BASE_URL}/trading/accounts/{account_id}/orders/{order_id}"
-    response = requests.delete(url, headers=HEADERS)
+    response = http_client.delete(url, headers=HEADERS, priority=http_client.PRIORITY_HIGH)
     response.raise_for_status()
     # Alpaca returns 204 No Content on successful cancel
     if response.status_code == 204:
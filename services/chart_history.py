@@ -0,0 +1,79 @@
+import os
+from collections import OrderedDict
+
+from services.market_data import load_stored_bars
+
+# Charts remembered per session, and how many of those keep their bars in
+# memory. Older charts keep only a key into the local bar store.
+CHART_HISTORY_LIMIT = int(os.environ.get("CHART_HISTORY_LIMIT", "20"))
+LIVE_CHART_LIMIT = int(os.environ.get("LIVE_CHART_LIMIT", "3"))
+
+
+class ChartHistory:
+    """
+    Per-session charts keyed by the chat message index they belong to.
+
+    The most recently used LIVE_CHART_LIMIT charts hold their Bars. The rest
+    are reduced to (symbol, timeframe, start, end) and re-read from the bar
+    store on demand. Past CHART_HISTORY_LIMIT the least recently used chart
+    is dropped.
+    """
+
+    def __init__(self, max_charts: int = CHART_HISTORY_LIMIT, max_live: int = LIVE_CHART_LIMIT):
+        self.max_charts = max_charts
+        self.max_live = max_live
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, idx):
+        return idx in self._entries
+
+    def add(self, idx, chart_info: dict):
+        bars = chart_info["bars"]
+        self._entries[idx] = {
+            "symbol": chart_info["symbol"],
+            "key": chart_info.get("key"),
+            "timeframe": bars.timeframe,
+            "start_ns": int(bars.t[0]),
+            "end_ns": int(bars.t[-1]),
+            "bars": bars,
+        }
+        self._entries.move_to_end(idx)
+        self._enforce_limits()
+
+    def peek(self, idx) -> dict | None:
+        """
+        Returns the chart's symbol and key without loading its bars or
+        changing its recency.
+        """
+        entry = self._entries.get(idx)
+        if entry is None:
+            return None
+        return {"symbol": entry["symbol"], "key": entry["key"]}
+
+    def latest_index(self):
+        return max(self._entries, default=None)
+
+    def get(self, idx) -> dict | None:
+        entry = self._entries.get(idx)
+        if entry is None:
+            return None
+
+        if entry["bars"] is None:
+            entry["bars"] = load_stored_bars(
+                entry["symbol"], entry["start_ns"], entry["end_ns"], entry["timeframe"]
+            )
+        self._entries.move_to_end(idx)
+        self._enforce_limits()
+
+        return {"symbol": entry["symbol"], "key": entry["key"], "bars": entry["bars"]}
+
+    def _enforce_limits(self):
+        while len(self._entries) > self.max_charts:
+            self._entries.popitem(last=False)
+
+        live = [entry for entry in self._entries.values() if entry["bars"] is not None]
+        for entry in live[:max(len(live) - self.max_live, 0)]:
+            entry["bars"] = None
@@ -0,0 +1,446 @@
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+DEFAULT_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))
+
+# Outbound quota governor. A governed host lets a burst of
+# GOVERNOR_BURST_SECONDS worth of requests through, then paces to its
+# requests-per-minute; waiting requests go out in priority order.
+GOVERNOR_BURST_SECONDS = float(os.environ.get("GOVERNOR_BURST_SECONDS", "5"))
+GOVERNOR_MAX_WAIT_SECONDS = float(os.environ.get("GOVERNOR_MAX_WAIT_SECONDS", "20"))
+# A 429 is retried (after its Retry-After) at most this many times.
+MAX_THROTTLE_RETRIES = 2
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+# Idempotent GETs are retried on connection errors, timeouts and these
+# statuses, with full-jitter exponential backoff capped at RETRY_MAX_DELAY.
+RETRY_ATTEMPTS = int(os.environ.get("HTTP_RETRY_ATTEMPTS", "2"))
+RETRY_BASE_DELAY = float(os.environ.get("HTTP_RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.environ.get("HTTP_RETRY_MAX_DELAY", "2"))
+RETRY_STATUSES = {500, 502, 503, 504}
+RETRY_METHODS = {"GET", "HEAD"}
+
+# After BREAKER_FAILURE_THRESHOLD consecutive failures a host's breaker opens
+# and calls fail fast; after BREAKER_RESET_SECONDS one probe is let through.
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30"))
+
+PRIORITY_HIGH = 0     # order placement and cancellation
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2      # background refreshes: sidebar, news
+
+_session = None
+_session_lock = threading.Lock()
+_mounted_hosts = {}
+_request_counts = {}
+_stats_lock = threading.Lock()
+
+_priority = contextvars.ContextVar("http_priority", default=PRIORITY_NORMAL)
+_governors = {}
+_breakers = {}
+
+
+class UpstreamBusy(requests.RequestException):
+    """
+    Raised when a request waited GOVERNOR_MAX_WAIT_SECONDS for its host's
+    quota without getting a turn.
+    """
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised without calling the upstream while its circuit breaker is open.
+    """
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """
+    True if the error means the upstream is rate limiting us, rather than
+    the request itself being wrong.
+    """
+    if isinstance(exc, UpstreamBusy):
+        return True
+    response = getattr(exc, "response", None)
+    return response is not None and response.status_code == 429
+
+
+@contextmanager
+def priority(level: int):
+    """
+    Sets the priority of every request made in this context. Worker threads
+    started through contextvars.copy_context() inherit it.
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _HostGovernor:
+    """
+    Token bucket for one upstream host with a priority queue of waiters.
+    Only the waiter at the head of the queue may take a token, so a queued
+    high-priority request always goes before lower-priority ones.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * GOVERNOR_BURST_SECONDS)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self.stats = {
+            "requests": 0,
+            "queued": 0,
+            "throttled": 0,
+            "timeouts": 0,
+            "wait_total_seconds": 0.0,
+            "wait_max_seconds": 0.0,
+        }
+
+    def acquire(self, level: int):
+        start = time.monotonic()
+        deadline = start + GOVERNOR_MAX_WAIT_SECONDS
+        entry = (level, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry:
+                        ready_at = max(self.blocked_until, now + (1.0 - self.tokens) / self.rate)
+                        if ready_at <= now:
+                            self.tokens -= 1.0
+                            break
+                    else:
+                        ready_at = deadline
+                    if now >= deadline:
+                        self.stats["timeouts"] += 1
+                        raise UpstreamBusy("Upstream request quota is exhausted; try again shortly.")
+                    self._cond.wait(min(ready_at, deadline) - now)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self.stats["requests"] += 1
+            if waited > 0.001:
+                self.stats["queued"] += 1
+            self.stats["wait_total_seconds"] += waited
+            self.stats["wait_max_seconds"] = max(self.stats["wait_max_seconds"], waited)
+
+    def block(self, seconds: float):
+        with self._cond:
+            self.stats["throttled"] += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            # The upstream says we are over quota; don't burst straight back.
+            self.tokens = min(self.tokens, 0.0)
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            stats = dict(self.stats)
+            stats["queue_depth"] = len(self._waiters)
+            stats["blocked_for_seconds"] = max(0.0, self.blocked_until - time.monotonic())
+        stats["wait_avg_seconds"] = stats["wait_total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream host.
+
+    closed: requests flow; failures are counted.
+    open: requests fail fast with CircuitOpenError until reset_timeout passes.
+    half_open: a single probe request is allowed; its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.stats = {"failures": 0, "rejected": 0, "opened": 0}
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "closed":
+                return
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.stats["rejected"] += 1
+        raise CircuitOpenError("Upstream is unavailable; not retrying until it recovers.")
+
+    def record(self, success: bool | None):
+        """
+        success=None means the call ended without telling us anything about
+        the upstream's health (e.g. it timed out waiting for quota).
+        """
+        with self._lock:
+            self._probe_in_flight = False
+            if success is None:
+                return
+            if success:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            self.stats["failures"] += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.stats["opened"] += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == "open":
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            return {
+                **self.stats,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in_seconds": retry_in,
+            }
+
+
+def _backoff_delay(attempt: int) -> float:
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _breaker_for(origin: str) -> CircuitBreaker:
+    breaker = _breakers.get(origin)
+    if breaker is None:
+        with _stats_lock:
+            breaker = _breakers.setdefault(origin, CircuitBreaker())
+    return breaker
+
+
+def _retry_after_seconds(response: requests.Response) -> float:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _build_adapter(pool_maxsize: int) -> HTTPAdapter:
+    # pool_connections is the number of per-host pools the adapter keeps;
+    # pool_maxsize is the number of keep-alive connections kept per host.
+    return HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, pool_block=False)
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide session shared by all upstream calls.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                default_adapter = _build_adapter(DEFAULT_POOL_MAXSIZE)
+                session.mount("https://", default_adapter)
+                session.mount("http://", default_adapter)
+                _session = session
+    return _session
+
+
+def mount_host(base_url: str, pool_maxsize: int | None = None,
+               requests_per_minute: float | None = None):
+    """
+    Gives a host its own connection pool sized for its expected concurrency
+    and, with `requests_per_minute`, a process-wide outbound quota.
+    Safe to call more than once; only the first call per host takes effect.
+    """
+    origin = _origin(base_url)
+    session = get_session()
+    with _session_lock:
+        if origin in _mounted_hosts:
+            return
+        size = pool_maxsize or DEFAULT_POOL_MAXSIZE
+        session.mount(origin, _build_adapter(size))
+        _mounted_hosts[origin] = size
+        if requests_per_minute:
+            _governors[origin] = _HostGovernor(requests_per_minute)
+
+
+def request(method: str, url: str, *, timeout=None, priority=None, retries=None,
+            **kwargs) -> requests.Response:
+    """
+    Sends a request over the shared session.
+
+    The host's circuit breaker is checked first and raises CircuitOpenError
+    while open. On a governed host the request then waits for a quota slot
+    (in `priority` order, defaulting to the context's priority); a 429
+    pauses the whole host for its Retry-After before being retried. GETs
+    are retried up to `retries` times (default RETRY_ATTEMPTS) on
+    connection errors, timeouts and 5xx responses.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    if priority is None:
+        priority = _priority.get()
+    if retries is None:
+        retries = RETRY_ATTEMPTS if method.upper() in RETRY_METHODS else 0
+
+    origin = _origin(url)
+    breaker = _breaker_for(origin)
+    breaker.allow()
+
+    try:
+        response = _send(method, url, origin, priority, retries, timeout=timeout, **kwargs)
+    except UpstreamBusy:
+        breaker.record(None)
+        raise
+    except requests.RequestException:
+        breaker.record(False)
+        raise
+    except BaseException:
+        breaker.record(None)
+        raise
+
+    breaker.record(response.status_code < 500)
+    return response
+
+
+def _send(method: str, url: str, origin: str, priority: int, retries: int,
+          **kwargs) -> requests.Response:
+    governor = _governors.get(origin)
+    attempt = 0
+    throttle_retries = 0
+
+    while True:
+        if governor is not None:
+            governor.acquire(priority)
+
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+        finally:
+            with _stats_lock:
+                _request_counts[origin] = _request_counts.get(origin, 0) + 1
+
+        if response.status_code == 429 and governor is not None and throttle_retries < MAX_THROTTLE_RETRIES:
+            governor.block(_retry_after_seconds(response))
+            response.close()
+            throttle_retries += 1
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            response.close()
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request("DELETE", url, **kwargs)
+
+
+def get_pool_stats() -> list[dict]:
+    """
+    Returns one entry per live host pool: connections opened, requests sent
+    over them and connections currently idle (available for reuse).
+    """
+    session = get_session()
+    with _session_lock:
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+
+    with _stats_lock:
+        request_counts = dict(_request_counts)
+
+    stats = []
+    for adapter in adapters.values():
+        pool_manager = adapter.poolmanager
+        for key in pool_manager.pools.keys():
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            origin = f"{pool.scheme}://{pool.host}"
+            if pool.port not in (None, 80, 443):
+                origin += f":{pool.port}"
+            stats.append({
+                "host": origin,
+                "pool_maxsize": _mounted_hosts.get(origin, DEFAULT_POOL_MAXSIZE),
+                "connections_opened": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+                "requests_issued": request_counts.get(origin, 0),
+            })
+    return stats
+
+
+def get_governor_stats() -> dict:
+    """
+    Per governed host: queue depth, requests sent, how many had to queue,
+    wait times, 429s seen and how long the host is still paused for.
+    """
+    return {origin: governor.snapshot() for origin, governor in list(_governors.items())}
+
+
+def get_breaker_stats() -> dict:
+    """
+    Per upstream host: breaker state, consecutive failures, how many calls
+    were rejected while open and seconds until the next probe.
+    """
+    return {origin: breaker.snapshot() for origin, breaker in list(_breakers.items())}
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+# Azure Table transactions accept at most 100 operations, all in one partition.
+MAX_BATCH_SIZE = 100
+LOG_FILE_PATH = os.environ.get("LOG_FILE_PATH", os.path.join("data", "chat_log.jsonl"))
+
+
+class LogSink(ABC):
+    """
+    Destination for conversation log entities. `write_batch` receives up to
+    MAX_BATCH_SIZE entities sharing one PartitionKey and returns how many
+    were stored.
+    """
+
+    @abstractmethod
+    def write_batch(self, entities: list[dict]) -> int:
+        pass
+
+    def close(self):
+        pass
+
+
+class NullSink(LogSink):
+    def write_batch(self, entities: list[dict]) -> int:
+        return len(entities)
+
+
+class JsonlFileSink(LogSink):
+    """
+    Appends one JSON object per entity to a local file.
+    """
+
+    def __init__(self, path: str = LOG_FILE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write_batch(self, entities: list[dict]) -> int:
+        lines = "".join(json.dumps(dict(entity), default=str) + "\n" for entity in entities)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(lines)
+        return len(entities)
+
+
+class AzureTableSink(LogSink):
+    """
+    Writes each batch as one Azure Table transaction. `table_client` only
+    needs `submit_transaction` and `create_entity`, so InMemoryTableClient
+    can stand in for it.
+    """
+
+    def __init__(self, table_client):
+        self.table_client = table_client
+
+    @classmethod
+    def from_connection_string(cls, connection_string: str, table_name: str):
+        from azure.data.tables import TableServiceClient
+
+        service = TableServiceClient.from_connection_string(conn_str=connection_string)
+        table_client = service.get_table_client(table_name=table_name)
+
+        # Create table if it doesn't exist. Any failure here (already exists,
+        # a SAS token that may insert but not create, a network blip) is left
+        # to surface on the first write instead.
+        try:
+            table_client.create_table()
+        except Exception:
+            logger.debug("create_table failed for %s", table_name, exc_info=True)
+
+        return cls(table_client)
+
+    def write_batch(self, entities: list[dict]) -> int:
+        try:
+            self.table_client.submit_transaction([("create", entity) for entity in entities])
+            return len(entities)
+        except Exception:
+            # One bad entity fails the whole transaction; retry individually
+            # so the rest still land.
+            logger.warning("Log transaction failed; retrying %d entities one by one", len(entities))
+
+        written = 0
+        for entity in entities:
+            try:
+                self.table_client.create_entity(entity=entity)
+                written += 1
+            except Exception:
+                logger.exception("Failed to write log entity")
+        return written
+
+
+class InMemoryTableClient:
+    """
+    Stand-in for azure.data.tables.TableClient, for tests and benchmarks.
+    """
+
+    def __init__(self):
+        self.entities = []
+        self.transactions = 0
+        self._lock = threading.Lock()
+
+    def create_entity(self, entity):
+        with self._lock:
+            self.entities.append(dict(entity))
+
+    def submit_transaction(self, operations):
+        partition_keys = {entity["PartitionKey"] for _, entity in operations}
+        if len(partition_keys) > 1 or len(operations) > MAX_BATCH_SIZE:
+            raise ValueError("A transaction must target one partition and hold at most 100 operations.")
+        with self._lock:
+            self.entities.extend(dict(entity) for _, entity in operations)
+            self.transactions += 1
@@ -1,25 +1,201 @@
-from azure.data.tables import TableServiceClient, TableEntity
+import atexit
 import datetime
+import logging
+import os
+import queue
+import threading
+import time
 import uuid
-import streamlit as st
 
-# Load connection string from secrets
-connection_string = st.secrets["azure"]["table_connection_string"]
-table_name = st.secrets["azure"]["table_name"]
+from services.log_sinks import MAX_BATCH_SIZE, AzureTableSink, JsonlFileSink, LogSink, NullSink
 
-# Initialize service client
-service = TableServiceClient.from_connection_string(conn_str=connection_string)
-table_client = service.get_table_client(table_name=table_name)
+logger = logging.getLogger(__name__)
+
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_FLUSH_INTERVAL_SECONDS = float(os.environ.get("LOG_FLUSH_INTERVAL_SECONDS", "1.0"))
+# How long to wait before trying again when the sink could not be built.
+SINK_RETRY_SECONDS = float(os.environ.get("LOG_SINK_RETRY_SECONDS", "60"))
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+class BatchingLogWriter:
+    """
+    Writes log entities from a background thread so logging never blocks
+    the request path.
+
+    Entities wait in a bounded queue; the worker drains it, groups entities
+    by PartitionKey and hands each group to the sink in batches of up to
+    MAX_BATCH_SIZE. When the queue is full new entities are dropped and
+    counted rather than slowing the caller down.
+
+    Pass either a ready `sink` or a `sink_factory`. A factory is called on
+    the worker thread, so building the sink (reading secrets, reaching
+    Azure) never runs in a user's turn; if it fails, the batch is counted
+    as failed and the factory is tried again after SINK_RETRY_SECONDS.
+    """
+
+    def __init__(self, sink: LogSink | None = None, max_queue: int = LOG_QUEUE_SIZE,
+                 batch_size: int = MAX_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL_SECONDS,
+                 sink_factory=None):
+        if sink is None and sink_factory is None:
+            raise ValueError("BatchingLogWriter needs a sink or a sink_factory")
+        self.sink = sink
+        self.sink_factory = sink_factory
+        self._sink_retry_at = 0.0
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "dropped": 0, "written": 0, "failed": 0, "batches": 0}
+        self._worker = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._worker.start()
+
+    def submit(self, entity) -> bool:
+        if self._stop.is_set():
+            # No worker will drain the queue once close() has been called.
+            self._count("dropped")
+            return False
+        try:
+            self._queue.put_nowait(entity)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until everything queued so far has been written (or failed).
+        Returns False if the timeout ran out or the worker is no longer
+        running to drain the queue.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if not self._worker.is_alive():
+                    return False
+                wait = 0.1
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return False
+                self._queue.all_tasks_done.wait(wait)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        self._stop.set()
+        self._worker.join(timeout)
+        # A worker still inside write_batch would be writing to a closed sink.
+        if self.sink is not None and not self._worker.is_alive():
+            self.sink.close()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {**self._stats, "queue_depth": self._queue.qsize()}
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            pending = [first]
+            while len(pending) < LOG_QUEUE_SIZE:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(pending)
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+
+    def _ensure_sink(self) -> bool:
+        if self.sink is not None:
+            return True
+        if time.monotonic() < self._sink_retry_at:
+            return False
+        try:
+            self.sink = self.sink_factory()
+            return True
+        except Exception:
+            logger.exception("Could not open the log sink; retrying in %.0fs", SINK_RETRY_SECONDS)
+            self._sink_retry_at = time.monotonic() + SINK_RETRY_SECONDS
+            return False
+
+    def _write(self, entities):
+        if not self._ensure_sink():
+            self._count("failed", len(entities))
+            return
+
+        partitions = {}
+        for entity in entities:
+            partitions.setdefault(entity["PartitionKey"], []).append(entity)
+
+        for group in partitions.values():
+            for start in range(0, len(group), self.batch_size):
+                batch = group[start:start + self.batch_size]
+                try:
+                    written = self.sink.write_batch(batch)
+                except Exception:
+                    logger.exception("Failed to write %d log entities", len(batch))
+                    written = 0
+                self._count("batches")
+                self._count("written", written)
+                self._count("failed", len(batch) - written)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+def _build_sink() -> LogSink:
+    """
+    Picks the log sink on first use: LOG_SINK=azure|jsonl|none, or Azure
+    when Streamlit secrets carry table settings, otherwise no logging.
+    Errors reaching Azure propagate so the writer retries later.
+    """
+    choice = os.environ.get("LOG_SINK", "").strip().lower()
+
+    if choice in ("none", "off"):
+        return NullSink()
+    if choice == "jsonl":
+        return JsonlFileSink()
+
+    try:
+        import streamlit as st
+        azure_settings = st.secrets["azure"]
+        connection_string = azure_settings["table_connection_string"]
+        table_name = azure_settings["table_name"]
+    except Exception:
+        if choice == "azure":
+            logger.warning("LOG_SINK=azure but no Azure table secrets are configured; logging disabled")
+        return NullSink()
+
+    return AzureTableSink.from_connection_string(connection_string, table_name)
+
+
+def get_log_writer() -> BatchingLogWriter:
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                writer = BatchingLogWriter(sink_factory=_build_sink)
+                atexit.register(writer.close)
+                _log_writer = writer
+    return _log_writer
 
-# Create table if it doesn't exist
-try:
-    table_client.create_table()
-except:
-    pass
 
 def log_message(role: str, message: str, session_id: str = None):
     """
-    Logs a chat message to Azure Table Storage.
+    Queues a chat message for the configured log sink.
 
     role: 'user' or 'assistant'
     message: message content
@@ -28,11 +204,18 @@ def log_message(role: str, message: str, session_id: str = None):
     if not session_id:
         session_id = "default"
 
-    entity = TableEntity()
-    entity["PartitionKey"] = session_id  # group by session
-    entity["RowKey"] = str(uuid.uuid4())  # unique ID
-    entity["Timestamp"] = datetime.datetime.utcnow()
-    entity["Role"] = role
-    entity["Message"] = message
+    entity = {
+        "PartitionKey": session_id,  # group by session
+        "RowKey": str(uuid.uuid4()),  # unique ID
+        "Timestamp": datetime.datetime.utcnow(),
+        "Role": role,
+        "Message": message,
+    }
+
+    get_log_writer().submit(entity)
+
 
-    table_client.create_entity(entity=entity)
+def get_log_stats() -> dict:
+    if _log_writer is None:
+        return {}
+    return _log_writer.stats()
@@ -1,18 +1,53 @@
 import os
-import requests
+import time
 from datetime import datetime, timedelta
-import pandas as pd
 
-ALPACA_DATA_URL = "https://data.sandbox.alpaca.markets/v2/stocks/{symbol}/snapshot?feed=delayed_sip"
+from services import http_client
+from services.bar_store import BarStore, bars_to_records, date_to_ns
+from services.bars import Bars
+from services.cache import TTLCache
+
+ALPACA_DATA_BASE_URL = os.environ.get("ALPACA_DATA_BASE_URL", "https://data.sandbox.alpaca.markets/v2")
+ALPACA_DATA_URL = ALPACA_DATA_BASE_URL + "/stocks/{symbol}/snapshot"
+ALPACA_SNAPSHOTS_URL = ALPACA_DATA_BASE_URL + "/stocks/snapshots"
+DEFAULT_FEED = "delayed_sip"
 ALPACA_API_KEY = os.environ.get("ALPACA_API_KEY")
 ALPACA_SECRET_KEY = os.environ.get("ALPACA_SECRET_KEY")
-BASE_URL = "https://data.sandbox.alpaca.markets/v2/stocks/bars"
+BASE_URL = ALPACA_DATA_BASE_URL + "/stocks/bars"
+DATA_POOL_SIZE = int(os.environ.get("MARKET_DATA_POOL_SIZE", "10"))
+DATA_REQUESTS_PER_MINUTE = float(os.environ.get("MARKET_DATA_REQUESTS_PER_MINUTE", "200"))
+
+http_client.mount_host(BASE_URL, pool_maxsize=DATA_POOL_SIZE, requests_per_minute=DATA_REQUESTS_PER_MINUTE)
+
+HISTORY_TIMEFRAME = "1Day"
+# Within this long of the last sync, stored history is served without
+# re-requesting the most recent day.
+HISTORY_SYNC_TTL_SECONDS = float(os.environ.get("HISTORY_SYNC_TTL_SECONDS", "900"))
+
+_bar_store = BarStore()
+
+# Snapshots are shared by every session in the process. Within QUOTE_TTL_SECONDS
+# a cached quote is served as-is; for QUOTE_STALE_SECONDS after that it is still
+# served immediately while a background call refreshes it.
+QUOTE_TTL_SECONDS = float(os.environ.get("QUOTE_TTL_SECONDS", "5"))
+QUOTE_STALE_SECONDS = float(os.environ.get("QUOTE_STALE_SECONDS", "30"))
+QUOTE_CACHE_SIZE = int(os.environ.get("QUOTE_CACHE_SIZE", "512"))
+
+# Keeps each snapshots request URL comfortably under common 2-8 KB limits.
+SNAPSHOT_BATCH_SIZE = 100
+MAX_SYMBOLS_PARAM_CHARS = 1500
+
+_snapshot_cache = TTLCache(
+    maxsize=QUOTE_CACHE_SIZE,
+    ttl=QUOTE_TTL_SECONDS,
+    stale_ttl=QUOTE_STALE_SECONDS,
+)
 
 class AlpacaMarketDataError(Exception):
     pass
 
 
-def fetch_market_data(symbol: str) -> dict:
+def fetch_market_data(symbol: str, feed: str = DEFAULT_FEED) -> dict:
     symbol = (symbol or "").strip().upper()
     if not symbol:
         raise AlpacaMarketDataError("Symbol is required to fetch market data.")
@@ -20,14 +55,95 @@ def fetch_market_data(symbol: str) -> dict:
     if not ALPACA_API_KEY or not ALPACA_SECRET_KEY:
         raise AlpacaMarketDataError("Alpaca credentials are not configured.")
 
-    url = ALPACA_DATA_URL.format(symbol=symbol)
+    data = _snapshot_cache.get_or_load(
+        (symbol, feed), lambda: _fetch_snapshot(symbol, feed)
+    )
+    return dict(data)
+
+
+def get_quote_cache_stats() -> dict:
+    return _snapshot_cache.stats()
+
+
+def fetch_market_data_batch(symbols, feed: str = DEFAULT_FEED) -> dict:
+    """
+    Prices many symbols with one snapshots call per chunk. Returns a dict of
+    symbol -> the same normalized quote `fetch_market_data` returns; symbols
+    Alpaca has no data for are left out.
+    """
+    normalized = list(dict.fromkeys(
+        symbol.strip().upper() for symbol in symbols if symbol and symbol.strip()
+    ))
+    if not normalized:
+        return {}
+
+    if not ALPACA_API_KEY or not ALPACA_SECRET_KEY:
+        raise AlpacaMarketDataError("Alpaca credentials are not configured.")
+
+    results = {}
+    missing = []
+    for symbol in normalized:
+        cached = _snapshot_cache.get((symbol, feed))
+        if cached is not None:
+            results[symbol] = dict(cached)
+        else:
+            missing.append(symbol)
+
+    for chunk in _chunk_symbols(missing):
+        response = http_client.get(
+            ALPACA_SNAPSHOTS_URL,
+            headers=_auth_headers(),
+            params={"symbols": ",".join(chunk), "feed": feed},
+        )
+
+        if response.status_code != 200:
+            raise AlpacaMarketDataError(
+                f"Snapshots request failed: {response.status_code} - {response.text}"
+            )
+
+        payload = response.json() or {}
+        # Older API versions nest the per-symbol map under "snapshots".
+        snapshots = payload.get("snapshots", payload)
+
+        for symbol in chunk:
+            data = snapshots.get(symbol)
+            if not data:
+                continue
+            quote = _normalize_snapshot(symbol, data)
+            _snapshot_cache.set((symbol, feed), quote)
+            results[symbol] = dict(quote)
+
+    return results
+
 
-    headers = {
+def _auth_headers() -> dict:
+    return {
         "APCA-API-KEY-ID": ALPACA_API_KEY,
         "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY
     }
 
-    response = requests.get(url, headers=headers)
+
+def _chunk_symbols(symbols):
+    # Each comma is sent URL-encoded (%2C), so it costs three characters.
+    chunk = []
+    length = 0
+    for symbol in symbols:
+        added = len(symbol) + (3 if chunk else 0)
+        if chunk and (len(chunk) >= SNAPSHOT_BATCH_SIZE or length + added > MAX_SYMBOLS_PARAM_CHARS):
+            yield chunk
+            chunk = []
+            length = 0
+            added = len(symbol)
+        chunk.append(symbol)
+        length += added
+    if chunk:
+        yield chunk
+
+
+def _fetch_snapshot(symbol: str, feed: str) -> dict:
+    url = ALPACA_DATA_URL.format(symbol=symbol)
+
+    response = http_client.get(url, headers=_auth_headers(), params={"feed": feed})
 
     if response.status_code != 200:
         raise AlpacaMarketDataError(
@@ -39,10 +155,14 @@ def fetch_market_data(symbol: str) -> dict:
     if not data:
         raise AlpacaMarketDataError("No data returned from Alpaca snapshot API.")
 
-    latest_trade = data.get("latestTrade", {})
-    latest_quote = data.get("latestQuote", {})
-    daily_bar = data.get("dailyBar", {})
-    prev_daily_bar = data.get("prevDailyBar", {})
+    return _normalize_snapshot(symbol, data)
+
+
+def _normalize_snapshot(symbol: str, data: dict) -> dict:
+    latest_trade = data.get("latestTrade") or {}
+    latest_quote = data.get("latestQuote") or {}
+    daily_bar = data.get("dailyBar") or {}
+    prev_daily_bar = data.get("prevDailyBar") or {}
 
     current_price = latest_trade.get("p")
     previous_close = prev_daily_bar.get("c")
@@ -65,12 +185,62 @@ def fetch_market_data(symbol: str) -> dict:
     }
 
 def fetch_30_day_history(symbol: str):
+    return fetch_history(symbol, days=30)
+
+
+def fetch_history(symbol: str, days: int = 30):
+    """
+    Returns daily bars for the last `days` days as a time-sorted Bars.
+
+    Bars are served from the local bar store; only dates outside the stored
+    coverage are requested, plus the most recent stored day since its bar may
+    still have been forming when it was fetched. That refresh is skipped when
+    coverage already reaches today and was synced within
+    HISTORY_SYNC_TTL_SECONDS.
+    """
+    symbol = symbol.strip().upper()
     end = datetime.now().date()
-    start = end - timedelta(days=30)
+    start = end - timedelta(days=days)
 
+    coverage = _bar_store.coverage(symbol, HISTORY_TIMEFRAME)
+    if coverage is None:
+        _sync_bars(symbol, start, end)
+    else:
+        covered_from, covered_to = coverage
+        synced_at = _bar_store.synced_at(symbol, HISTORY_TIMEFRAME)
+        if start < covered_from:
+            _sync_bars(symbol, start, covered_from)
+        stale = synced_at is None or time.time() - synced_at >= HISTORY_SYNC_TTL_SECONDS
+        if covered_to < end or stale:
+            _sync_bars(symbol, min(covered_to, end), end)
+
+    records = _bar_store.read(
+        symbol,
+        HISTORY_TIMEFRAME,
+        start_ns=date_to_ns(start),
+        end_ns=date_to_ns(end + timedelta(days=1)) - 1,
+    )
+    return Bars(symbol, records, HISTORY_TIMEFRAME)
+
+
+def load_stored_bars(symbol: str, start_ns: int, end_ns: int, timeframe: str = HISTORY_TIMEFRAME):
+    """
+    Reads a previously fetched window back from the bar store, without any
+    network call.
+    """
+    records = _bar_store.read(symbol, timeframe, start_ns=start_ns, end_ns=end_ns)
+    return Bars(symbol, records, timeframe)
+
+
+def _sync_bars(symbol: str, start, end):
+    bars = _fetch_bars(symbol, start, end)
+    _bar_store.merge(symbol, HISTORY_TIMEFRAME, bars_to_records(bars), start, end)
+
+
+def _fetch_bars(symbol: str, start, end) -> list[dict]:
     params = {
         "symbols": symbol,
-        "timeframe": "1Day",
+        "timeframe": HISTORY_TIMEFRAME,
         "start": start.isoformat(),
         "end": end.isoformat(),
         "limit": 1000,
@@ -79,20 +249,20 @@ def fetch_30_day_history(symbol: str):
         "sort" : "asc"
     }
 
-    headers = {
-        "APCA-API-KEY-ID": ALPACA_API_KEY,
-        "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY,
-    }
+    bars = []
+    while True:
+        response = http_client.get(BASE_URL, headers=_auth_headers(), params=params)
+        response.raise_for_status()
 
-    response = requests.get(BASE_URL, headers=headers, params=params)
-    response.raise_for_status()
+        data = response.json()
+        bars.extend((data.get("bars") or {}).get(symbol, []))
 
-    data = response.json()
-    return data.get("bars", {}).get(symbol, [])
+        page_token = data.get("next_page_token")
+        if not page_token:
+            return bars
+        params["page_token"] = page_token
 
 def bars_to_dataframe(bars):
-    df = pd.DataFrame(bars)
-    df["t"] = pd.to_datetime(df["t"])
-    df.set_index("t", inplace=True)
-    return df
-
+    if isinstance(bars, Bars):
+        return bars.to_dataframe()
+    return Bars("", bars_to_records(bars)).to_dataframe()
@@ -4,6 +4,9 @@ from typing import Iterable, List
 
 import requests
 
+from services import http_client
+from services.cache import TTLCache
+
 
 class NewsAPIError(Exception):
     pass
@@ -16,6 +19,16 @@ PERIGON_API_KEY = os.environ.get("PERIGON_API_KEY") or os.environ.get("NEWS_API_
 
 DEFAULT_LIMIT = 5
 RECENT_DAYS = 10
+NEWS_POOL_SIZE = int(os.environ.get("NEWS_POOL_SIZE", "4"))
+NEWS_REQUESTS_PER_MINUTE = float(os.environ.get("NEWS_REQUESTS_PER_MINUTE", "60"))
+
+http_client.mount_host(PERIGON_API_URL, pool_maxsize=NEWS_POOL_SIZE, requests_per_minute=NEWS_REQUESTS_PER_MINUTE)
+
+# Article lists are shared by every session in the process.
+NEWS_CACHE_TTL_SECONDS = float(os.environ.get("NEWS_CACHE_TTL_SECONDS", "300"))
+NEWS_CACHE_SIZE = int(os.environ.get("NEWS_CACHE_SIZE", "256"))
+
+_article_cache = TTLCache(maxsize=NEWS_CACHE_SIZE, ttl=NEWS_CACHE_TTL_SECONDS)
 
 
 def _validate_api_credentials():
@@ -51,6 +64,26 @@ def fetch_news_articles(
 
     final_query = " ".join(dict.fromkeys(part for part in search_parts if part))
 
+    cache_key = (
+        normalized.lower(),
+        (company_symbol or "").upper(),
+        (company_name or "").lower(),
+        start_date.isoformat(),
+        today.isoformat(),
+        limit,
+    )
+    articles = _article_cache.get_or_load(
+        cache_key,
+        lambda: _request_articles(normalized, limit, start_date, today, company_symbol, company_name),
+    )
+    return list(articles)
+
+
+def get_news_cache_stats() -> dict:
+    return _article_cache.stats()
+
+
+def _request_articles(normalized, limit, start_date, today, company_symbol, company_name) -> List[dict]:
     params = {
         "apiKey": PERIGON_API_KEY,
         "pageSize": min(limit, 20),
@@ -77,7 +110,7 @@ def fetch_news_articles(
 
 
     try:
-        response = requests.get(PERIGON_API_URL, params=params, timeout=10)
+        response = http_client.get(PERIGON_API_URL, params=params, priority=http_client.PRIORITY_LOW)
         response.raise_for_status()
     except requests.RequestException as exc:
         raise NewsAPIError(f"News API request failed: {str(exc)}") from exc
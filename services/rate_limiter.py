@@ -0,0 +1,211 @@
+import contextvars
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DB_PATH = os.environ.get("RATE_LIMIT_DB_PATH", os.path.join("data", "rate_limits.sqlite3"))
+
+# "<tokens>/<seconds>": a bucket holds up to <tokens> and refills at that rate.
+BUCKET_DEFAULTS = {
+    "chat": "20/60",      # chat turns
+    "llm": "30/3600",     # LLM requests
+    "broker": "60/60",    # upstream broker API calls
+}
+# How many acquisitions between deletes of idle (already full) buckets.
+PRUNE_EVERY = 500
+
+_client_key = contextvars.ContextVar("rate_limit_client_key", default="anonymous")
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, bucket: str, retry_after: float):
+        self.bucket = bucket
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit exceeded for {bucket}; retry in {retry_after:.0f}s")
+
+
+def _parse_rate(spec: str) -> tuple[float, float]:
+    tokens, seconds = spec.split("/")
+    capacity = float(tokens)
+    return capacity, capacity / float(seconds)
+
+
+def set_client_key(key: str):
+    """
+    Sets who the current context's requests count against (user, session or
+    IP). Threads started through contextvars.copy_context() inherit it.
+    """
+    _client_key.set(key or "anonymous")
+
+
+def get_client_key() -> str:
+    return _client_key.get()
+
+
+def resolve_client_key(
+    forwarded_for: str = "",
+    ip_address: str | None = None,
+    client_id: str | None = None,
+    trusted_proxy_hops: int = 0,
+) -> str:
+    """
+    Picks the most stable identity available for a client: the address the
+    outermost of `trusted_proxy_hops` proxies appended to X-Forwarded-For,
+    then the socket peer address, then a client id the browser keeps across
+    refreshes. Anything left of the trusted hop is client-supplied and ignored.
+    """
+    if trusted_proxy_hops:
+        hops = [hop.strip() for hop in (forwarded_for or "").split(",") if hop.strip()]
+        if len(hops) >= trusted_proxy_hops:
+            return f"ip:{hops[-trusted_proxy_hops]}"
+    if ip_address:
+        return f"ip:{ip_address}"
+    if client_id:
+        return f"client:{client_id}"
+    return "anonymous"
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by (bucket, client key), stored in SQLite so every
+    Streamlit worker process on the host shares them.
+
+    Each acquisition reads and rewrites one row inside an immediate
+    transaction, refilling the bucket for the time elapsed since its last
+    use. If the store is unavailable the limiter fails open.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH, rates: dict | None = None):
+        self.path = path
+        self.rates = {
+            name: _parse_rate(os.environ.get(f"RATE_LIMIT_{name.upper()}", spec))
+            for name, spec in BUCKET_DEFAULTS.items()
+        }
+        self.rates.update(rates or {})
+        self._ops = 0
+        self._ops_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"allowed": 0, "limited": 0, "errors": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets ("
+                " bucket TEXT NOT NULL,"
+                " client_key TEXT NOT NULL,"
+                " tokens REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (bucket, client_key))"
+            )
+        finally:
+            conn.close()
+
+    def acquire(self, bucket: str, key: str | None = None, cost: float = 1.0) -> tuple[bool, float]:
+        """
+        Takes `cost` tokens from the bucket. Returns (allowed, retry_after),
+        where retry_after is the seconds until enough tokens are back.
+        """
+        capacity, refill_rate = self.rates[bucket]
+        key = key or get_client_key()
+        now = time.time()
+
+        try:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM token_buckets WHERE bucket = ? AND client_key = ?",
+                    (bucket, key),
+                ).fetchone()
+                tokens = capacity
+                if row is not None:
+                    tokens = min(capacity, row[0] + max(0.0, now - row[1]) * refill_rate)
+
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (bucket, client_key, tokens, updated_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (bucket, key, tokens, now),
+                )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            logger.exception("Rate limit store unavailable; allowing %s request", bucket)
+            self._count("errors")
+            return True, 0.0
+
+        self._count("allowed" if allowed else "limited")
+        self._maybe_prune()
+        if allowed:
+            return True, 0.0
+        return False, float(math.ceil((cost - tokens) / refill_rate)) if refill_rate else math.inf
+
+    def check(self, bucket: str, key: str | None = None, cost: float = 1.0):
+        """
+        Like acquire, but raises RateLimitExceeded when the bucket is empty.
+        """
+        allowed, retry_after = self.acquire(bucket, key, cost)
+        if not allowed:
+            raise RateLimitExceeded(bucket, retry_after)
+
+    def prune(self):
+        # A bucket untouched long enough to have refilled completely is the
+        # same as no row at all.
+        now = time.time()
+        conn = self._connect()
+        try:
+            for bucket, (capacity, refill_rate) in self.rates.items():
+                if refill_rate:
+                    conn.execute(
+                        "DELETE FROM token_buckets WHERE bucket = ? AND updated_at < ?",
+                        (bucket, now - capacity / refill_rate),
+                    )
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _maybe_prune(self):
+        with self._ops_lock:
+            self._ops += 1
+            prune = self._ops % PRUNE_EVERY == 0
+        if prune:
+            try:
+                self.prune()
+            except sqlite3.Error:
+                logger.exception("Failed to prune rate limit store")
+
+    def _connect(self):
+        # Autocommit mode; acquire manages its own transaction.
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = TokenBucketLimiter()
+    return _limiter
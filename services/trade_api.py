@@ -1,4 +1,7 @@
-from services.broker_app import list_accounts, list_orders, place_order, cancel_order
+from services import http_client
+from services.account_service import get_primary_account_id
+from services.broker_app import list_orders, place_order, cancel_order
+from services.rate_limiter import RateLimitExceeded
 
 
 class TradeService:
@@ -10,8 +13,7 @@ class TradeService:
         order_type = trade.get("order_type", "market")
         price = trade.get("price")
 
-        accounts = list_accounts()
-        account_id = accounts[0]["id"]
+        account_id = get_primary_account_id()
 
         try:
             order = place_order(
@@ -32,15 +34,21 @@ class TradeService:
                 f"Status: {order['status']}"
             )
 
+        except RateLimitExceeded as e:
+            return f"Trade not submitted: too many requests. Please try again in {e.retry_after:.0f} seconds."
+
         except Exception as e:
+            if http_client.is_throttled(e):
+                return "Trade not submitted: the brokerage is busy right now. Please try again in a moment."
+            if isinstance(e, http_client.CircuitOpenError):
+                return "Trade not submitted: the brokerage is unavailable right now. Please try again shortly."
             return (
                 f"Trade failed: Please ensure you have sufficient funds.\n\n"
                 f"At this time we only support trading in U.S.-listed securities.\n\n"
                 f"{str(e)}"
             )
     def cancel_trade(self, order_id):
-        accounts = list_accounts()
-        account_id = accounts[0]["id"]
+        account_id = get_primary_account_id()
 
         try:
             order = cancel_order(account_id=account_id, order_id=order_id)
@@ -55,9 +63,5 @@ class TradeService:
             return f"Cancel failed: {str(e)}"
 
     def list_open_orders(self, status="open", limit=50):
-        accounts = list_accounts()
-        if not accounts:
-            raise RuntimeError("No trading accounts could be loaded.")
-
-        account_id = accounts[0]["id"]
+        account_id = get_primary_account_id()
         return list_orders(account_id=account_id, limit=limit, status=status)
@@ -0,0 +1,146 @@
+"""
+Retry, throttling and circuit-breaker behaviour of services.http_client,
+exercised against a local http.server that injects faults.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import http_client
+
+
+class FaultServer:
+    """
+    Serves 200 "ok" unless a fault is queued for the next request. Faults
+    are (status, headers) pairs consumed in order.
+    """
+
+    def __init__(self):
+        self.faults = []
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond()
+
+            def do_POST(self):
+                self._respond()
+
+            def _respond(self):
+                with server._lock:
+                    server.requests.append((self.command, self.path))
+                    status, headers = server.faults.pop(0) if server.faults else (200, {})
+                body = b"ok" if status == 200 else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def fail_next(self, count: int, status: int = 503, headers: dict | None = None):
+        with self._lock:
+            self.faults.extend([(status, headers or {})] * count)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(http_client, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(http_client, "RETRY_MAX_DELAY", 0.02)
+    fake = FaultServer()
+    yield fake
+    fake.close()
+
+
+def test_get_is_retried_on_503(server):
+    server.fail_next(2)
+
+    response = http_client.get(server.url + "/quote", retries=2)
+
+    assert response.status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_get_returns_last_error_when_retries_run_out(server):
+    server.fail_next(3)
+
+    response = http_client.get(server.url + "/quote", retries=1)
+
+    assert response.status_code == 503
+    assert len(server.requests) == 2
+
+
+def test_post_is_not_retried(server):
+    server.fail_next(1)
+
+    response = http_client.post(server.url + "/orders", json={"qty": 1})
+
+    assert response.status_code == 503
+    assert server.requests == [("POST", "/orders")]
+
+
+def test_429_waits_for_retry_after_then_retries(server):
+    http_client.mount_host(server.url, requests_per_minute=600)
+    server.fail_next(1, status=429, headers={"Retry-After": "1"})
+
+    start = time.monotonic()
+    response = http_client.get(server.url + "/news")
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 200
+    assert len(server.requests) == 2
+    assert elapsed >= 0.9
+    assert http_client.get_governor_stats()[server.url]["throttled"] == 1
+
+
+def test_breaker_opens_then_half_opens_then_closes(server):
+    breaker = http_client._breaker_for(server.url)
+    breaker.failure_threshold = 2
+    breaker.reset_timeout = 0.2
+
+    server.fail_next(2)
+    for _ in range(2):
+        assert http_client.get(server.url + "/account", retries=0).status_code == 503
+    assert breaker.snapshot()["state"] == "open"
+
+    # While open, calls fail fast without reaching the server.
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(server.url + "/account")
+    assert len(server.requests) == 2
+
+    time.sleep(0.25)
+    assert http_client.get(server.url + "/account").status_code == 200
+    assert breaker.snapshot()["state"] == "closed"
+    assert len(server.requests) == 3
+
+
+def test_failed_half_open_probe_reopens_breaker(server):
+    breaker = http_client._breaker_for(server.url)
+    breaker.failure_threshold = 1
+    breaker.reset_timeout = 0.2
+
+    server.fail_next(2)
+    http_client.get(server.url + "/account", retries=0)
+    assert breaker.snapshot()["state"] == "open"
+
+    time.sleep(0.25)
+    http_client.get(server.url + "/account", retries=0)
+    assert breaker.snapshot()["state"] == "open"
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get(server.url + "/account")
@@ -0,0 +1,48 @@
+"""
+Rule-table intent classification. Pins which phrasings take the fast path
+(confidence at or above the orchestrator's 0.85 threshold) and which are
+left to the LLM.
+"""
+import pytest
+
+from llm.intent_rules import classify_intent_rules
+
+FAST_PATH_THRESHOLD = 0.85
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("buy 10 shares of aapl", "place_trade"),
+    ("please sell 5 msft", "place_trade"),
+    ("close all my positions", "place_trade"),
+    ("sell my holdings", "place_trade"),
+    ("show my portfolio", "view_portfolio"),
+    ("cancel my order for tsla", "cancel_order"),
+    ("show my open orders", "view_orders"),
+    ("what is the price of aapl", "market_data"),
+    ("update my address", "kyc"),
+    ("transfer 500 to my savings", "transfer"),
+])
+def test_clear_requests_take_the_fast_path(text, intent):
+    result = classify_intent_rules(text)
+    assert result["intent"] == intent
+    assert result["confidence"] >= FAST_PATH_THRESHOLD
+
+
+@pytest.mark.parametrize("text", [
+    "buy or sell nvda, what do you think?",
+    "should i buy tsla",
+    "sell now?",
+    "what is the address of apple hq",
+    "how do i buy stocks",
+    "how can i transfer money",
+])
+def test_questions_and_advice_are_left_to_the_llm(text):
+    assert classify_intent_rules(text)["confidence"] < FAST_PATH_THRESHOLD
+
+
+def test_price_asked_alongside_an_order_is_about_the_order():
+    assert classify_intent_rules("what price did my last order fill at")["intent"] == "view_orders"
+
+
+def test_unmatched_input_is_unknown():
+    assert classify_intent_rules("hello there") == {"intent": "unknown", "confidence": 0.0}
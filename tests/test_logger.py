@@ -0,0 +1,119 @@
+"""
+BatchingLogWriter behaviour against the in-memory table client.
+"""
+import threading
+
+from services.log_sinks import AzureTableSink, InMemoryTableClient, LogSink
+from services.logger import BatchingLogWriter
+
+
+def _entity(partition: str, row: int) -> dict:
+    return {"PartitionKey": partition, "RowKey": str(row), "Role": "user", "Message": f"m{row}"}
+
+
+class BlockingSink(LogSink):
+    """
+    Holds the worker inside write_batch until released, so the queue can be
+    filled deterministically.
+    """
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.written = []
+
+    def write_batch(self, entities):
+        self.entered.set()
+        self.release.wait(5)
+        self.written.extend(entities)
+        return len(entities)
+
+
+def test_batches_are_grouped_per_partition_and_capped_at_100():
+    client = InMemoryTableClient()
+    writer = BatchingLogWriter(AzureTableSink(client), flush_interval=0.05)
+
+    for row in range(250):
+        writer.submit(_entity(f"session{row % 2}", row))
+    writer.flush()
+    writer.close()
+
+    assert len(client.entities) == 250
+    # InMemoryTableClient rejects mixed-partition or oversized transactions,
+    # so every write succeeding means each batch respected both rules.
+    stats = writer.stats()
+    assert stats["written"] == 250
+    assert stats["failed"] == 0
+    assert client.transactions == stats["batches"]
+    assert client.transactions >= 3
+
+
+def test_full_queue_drops_and_counts():
+    sink = BlockingSink()
+    writer = BatchingLogWriter(sink, max_queue=2, flush_interval=0.05)
+
+    writer.submit(_entity("s", 0))
+    assert sink.entered.wait(5)  # the worker now holds entity 0
+
+    accepted = [writer.submit(_entity("s", row)) for row in range(1, 5)]
+    assert accepted == [True, True, False, False]
+    assert writer.stats()["dropped"] == 2
+
+    sink.release.set()
+    writer.flush()
+    writer.close()
+    assert [entity["RowKey"] for entity in sink.written] == ["0", "1", "2"]
+
+
+def test_close_flushes_pending_entities():
+    client = InMemoryTableClient()
+    writer = BatchingLogWriter(AzureTableSink(client), flush_interval=0.05)
+
+    for row in range(10):
+        writer.submit(_entity("s", row))
+    writer.close()
+
+    assert len(client.entities) == 10
+    assert writer.stats()["queue_depth"] == 0
+
+
+def test_failed_transaction_falls_back_to_single_inserts():
+    client = InMemoryTableClient()
+
+    def reject_transactions(operations):
+        raise RuntimeError("transaction rejected")
+
+    client.submit_transaction = reject_transactions
+    writer = BatchingLogWriter(AzureTableSink(client), flush_interval=0.05)
+
+    for row in range(3):
+        writer.submit(_entity("s", row))
+    writer.flush()
+    writer.close()
+
+    assert len(client.entities) == 3
+    assert writer.stats()["written"] == 3
+
+
+def test_close_leaves_a_busy_sink_open_and_rejects_later_submits():
+    closed = threading.Event()
+
+    class TrackingSink(BlockingSink):
+        def close(self):
+            closed.set()
+
+    sink = TrackingSink()
+    writer = BatchingLogWriter(sink, flush_interval=0.05)
+    writer.submit(_entity("s", 0))
+    assert sink.entered.wait(5)
+
+    writer.close(timeout=0.1)
+    assert not closed.is_set()  # the worker is still inside write_batch
+
+    assert writer.submit(_entity("s", 1)) is False
+    assert writer.stats()["dropped"] == 1
+    assert writer.flush(timeout=0.1) is False
+
+    sink.release.set()
+    assert writer.flush(timeout=5) is True
+    assert [entity["RowKey"] for entity in sink.written] == ["0"]
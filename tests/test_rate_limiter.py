@@ -0,0 +1,41 @@
+"""
+Client keying and bucket persistence of services.rate_limiter.
+"""
+from services.rate_limiter import TokenBucketLimiter, resolve_client_key
+
+
+def _drain(limiter, key):
+    while limiter.acquire("chat", key)[0]:
+        pass
+
+
+def test_fresh_session_from_same_address_keeps_drained_bucket(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / "limits.sqlite3"), rates={"chat": (3, 3 / 3600)})
+    # A refresh or a new tab gets a new client id, but the same address.
+    first = resolve_client_key(ip_address="203.0.113.7", client_id="tab-one")
+    _drain(limiter, first)
+
+    refreshed = resolve_client_key(ip_address="203.0.113.7", client_id="tab-two")
+    assert refreshed == first
+    allowed, retry_after = limiter.acquire("chat", refreshed)
+    assert not allowed
+    assert retry_after > 0
+
+
+def test_client_id_keeps_localhost_bucket_across_refresh(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / "limits.sqlite3"), rates={"chat": (2, 2 / 3600)})
+    _drain(limiter, resolve_client_key(ip_address=None, client_id="abc"))
+
+    assert not limiter.acquire("chat", resolve_client_key(ip_address=None, client_id="abc"))[0]
+    assert limiter.acquire("chat", resolve_client_key(ip_address=None, client_id="other"))[0]
+
+
+def test_forwarded_for_is_only_trusted_up_to_the_configured_hops():
+    forwarded = "10.0.0.1, 198.51.100.4, 192.0.2.9"
+
+    assert resolve_client_key(forwarded, "192.0.2.200", trusted_proxy_hops=1) == "ip:192.0.2.9"
+    assert resolve_client_key(forwarded, "192.0.2.200", trusted_proxy_hops=2) == "ip:198.51.100.4"
+    # Without trusted proxies a spoofed header is ignored.
+    assert resolve_client_key(forwarded, "192.0.2.200") == "ip:192.0.2.200"
+    # Fewer hops than configured means the header didn't come through the proxies.
+    assert resolve_client_key("10.0.0.1", "192.0.2.200", trusted_proxy_hops=2) == "ip:192.0.2.200"